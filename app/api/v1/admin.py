@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.db_metrics import pool_snapshot
+from app.core.deadline import deadline_metrics
+from app.core.dependencies import require_admin
+from app.core.lookup import identificacion_index
+from app.core.pagination import count_cache
+from app.core.principal import principal_cache
+from app.core.rate_limit import login_email_limiter, login_ip_limiter
+from app.core.revocation import revocation_list
+from app.core.security import token_cache, invalid_token_cache
+from app.database import engine, read_engine, replica_monitor, sql_stats
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    """Hit/miss counters of the in-process caches"""
+    return {
+        "principal": principal_cache.stats(),
+        "token": token_cache.stats(),
+        "invalid_token": invalid_token_cache.stats(),
+        "revocation_filter": revocation_list.stats(),
+        "list_counts": count_cache.stats(),
+        "identificacion_index": identificacion_index.stats(),
+    }
+
+@router.get("/metrics/rate-limit")
+async def rate_limit_metrics():
+    """State of the login attempt limiters"""
+    return {
+        "login_ip": login_ip_limiter.stats(),
+        "login_email": login_email_limiter.stats(),
+    }
+
+@router.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """Connection pool occupancy and checkout wait times"""
+    metrics = {
+        "primary": pool_snapshot(engine),
+        "replica_routing": replica_monitor.stats(),
+    }
+    if read_engine is not None:
+        metrics["replica"] = pool_snapshot(read_engine)
+    return metrics
+
+@router.get("/metrics/deadlines")
+async def deadline_metrics_view():
+    """Requests stopped by their deadline, a disconnect or a DB timeout"""
+    return deadline_metrics.stats()
+
+@router.get("/metrics/sql")
+async def sql_metrics(limit: int = Query(20, ge=1, le=500),
+                      order_by: str = Query("total_ms")):
+    """Top statements by accumulated time (or mean_ms, max_ms, count, slow)"""
+    try:
+        top = sql_stats.top(limit, order_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {**sql_stats.stats(), "top": top}
+
+@router.delete("/metrics/sql", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_sql_metrics():
+    """Start a new measurement window"""
+    sql_stats.reset()
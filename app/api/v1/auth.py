@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas.auth import LoginRequest, Token
+from app.database import get_db, get_read_db
+from app.core.rate_limit import check_login_attempt, get_client_ip
+from app.core.security import PasswordHashingBusyError, decode_token
+from app.schemas.auth import LoginRequest, Token, RefreshRequest
 from app.schemas.user import UserResponse, UserCreate, UserUpdate
 from app.services.auth_services import AuthService
-from app.core.dependencies import get_current_user
-from app.models.user import User
+from app.core.dependencies import get_current_user, security
+from app.core.principal import Principal
 from app.services.user_service import UserService
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(login_data: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """Start session and get token"""
+    retry_after = check_login_attempt(str(login_data.email), get_client_ip(request))
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(retry_after)}
+        )
+
     service = AuthService(db)
 
     user = await service.authenticate_user(login_data.email, login_data.password)
@@ -25,13 +36,57 @@ async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
         )
 
     access_token = service.create_token_for_user(user)
+    refresh_token = await service.issue_refresh_token(user)
+
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=Token)
+async def refresh(data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """Exchange a refresh token for new tokens (no password check)"""
+    service = AuthService(db)
+
+    rotated = await service.rotate_refresh_token(data.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token invalid/expired",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    user, refresh_token = rotated
+    access_token = service.create_token_for_user(user)
+
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(data: RefreshRequest | None = None,
+                 credentials: HTTPAuthorizationCredentials = Depends(security),
+                 current_user: Principal = Depends(get_current_user),
+                 db: AsyncSession = Depends(get_db)):
+    """Revoke the current access token and, if given, its refresh token"""
+    service = AuthService(db)
+    try:
+        await service.revoke_token(decode_token(credentials.credentials))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    if data is not None:
+        await service.revoke_refresh_token(data.refresh_token, current_user.id)
+
+    return None
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_user),
+                                db: AsyncSession = Depends(get_read_db, scope="function")):
     """Obtain information from the authenticated user"""
-    return current_user
+    service = UserService(db)
+    user = await service.get_user(current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 @router.put("/password", response_model=UserResponse, status_code=status.HTTP_200_OK)
 async def change_password(user_data: UserUpdate,
@@ -47,6 +102,8 @@ async def change_password(user_data: UserUpdate,
     try:
         user = await service.update_user(user.id, user_data)
         return user
+    except PasswordHashingBusyError:
+        raise
     except Exception as error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -2,11 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import HTTP_201_CREATED
 
-from app.database import get_db
+from app.core.batch import BatchValidationError
+from app.core.lookup import identificacion_index
+from app.core.pagination import CountStrategy
+from app.database import get_db, get_read_db
 from app.models.persona import TipoPersona
-from app.models.user import User
-from app.schemas.persona import PersonaCreate, PersonaUpdate, PersonaResponse, PersonaList
+from app.schemas.base import BatchResult
+from app.schemas.persona import (PersonaCreate, PersonaUpdate, PersonaResponse, PersonaList,
+                                 PersonaBatchCreate, PersonaBatchUpdate, PersonaBatchDelete,
+                                 PersonaBatchResponse, PersonaSearchResult,
+                                 IdentificacionLookupResult)
+from app.repositories.persona_repository import SearchUnavailableError
 from app.services.persona_service import PersonaService
+from app.core.principal import Principal
 from app.core.dependencies import get_current_user
 
 router = APIRouter(prefix="/persona", tags=["persona"])
@@ -15,7 +23,7 @@ router = APIRouter(prefix="/persona", tags=["persona"])
 async def create_person(
         data: PersonaCreate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
+        current_user: Principal = Depends(get_current_user)):
     """Create a new person"""
     service = PersonaService(db)
 
@@ -25,28 +33,120 @@ async def create_person(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def _batch_error(e: ValueError) -> HTTPException:
+    """400 with the errors of every rejected item"""
+    if isinstance(e, BatchValidationError):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                             detail={"message": str(e), "errors": e.errors})
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/batch", response_model=PersonaBatchResponse, status_code=HTTP_201_CREATED)
+async def create_persons_batch(
+        data: PersonaBatchCreate,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Create many persons in one transaction (all or nothing)"""
+    service = PersonaService(db)
+
+    try:
+        personas = await service.create_personas(data.personas)
+    except ValueError as e:
+        raise _batch_error(e)
+
+    return {"personas": personas, "total": len(personas)}
+
+@router.put("/batch", response_model=BatchResult)
+async def update_persons_batch(
+        data: PersonaBatchUpdate,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Update many persons in one transaction (all or nothing)"""
+    service = PersonaService(db)
+
+    try:
+        ids = await service.update_personas(data.personas)
+    except ValueError as e:
+        raise _batch_error(e)
+
+    return {"ids": ids, "total": len(ids)}
+
+@router.post("/batch/delete", response_model=BatchResult)
+async def delete_persons_batch(
+        data: PersonaBatchDelete,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Delete many persons; returns the ids that were active"""
+    service = PersonaService(db)
+
+    try:
+        ids = await service.delete_personas(data.ids)
+    except ValueError as e:
+        raise _batch_error(e)
+
+    return {"ids": ids, "total": len(ids)}
+
 @router.get("/", response_model=PersonaList)
 async def list_persons(skip: int = Query(0, ge=0),
                        limit: int = Query(10, ge= 1, le=100),
+                       after: str | None = Query(None, description="next_cursor of the previous page"),
                        tipo: TipoPersona | None = None,
-                       db: AsyncSession = Depends(get_db),
-                       current_user: User = Depends(get_current_user)):
-    """List all persons"""
+                       count: CountStrategy = Query(CountStrategy.CACHED,
+                                                    description="How the total is computed"),
+                       db: AsyncSession = Depends(get_read_db, scope="function"),
+                       current_user: Principal = Depends(get_current_user)):
+    """List all persons (pass next_cursor as after for the next page)"""
     service = PersonaService(db)
 
-    persona = await service.get_person_list(skip=skip, limit=limit, tipo=tipo)
-    total = await service.count_persons()
+    try:
+        page = await service.get_person_page(limit=limit, after=after, skip=skip,
+                                             tipo=tipo, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
-        "personas": persona,
-        "total": total,
+        "personas": page.items,
+        "total": page.total,
+        "total_exact": page.total_exact,
         "page": (skip // limit) + 1,
-        "per_page": limit
+        "per_page": limit,
+        "next_cursor": page.next_cursor,
     }
 
+@router.get("/search", response_model=PersonaSearchResult)
+async def search_persons(q: str = Query(..., min_length=3, max_length=100,
+                                        description="Part of a name, surname or business name"),
+                         limit: int = Query(10, ge=1, le=100),
+                         after: str | None = Query(None, description="next_cursor of the previous page"),
+                         db: AsyncSession = Depends(get_read_db, scope="function"),
+                         current_user: Principal = Depends(get_current_user)):
+    """Search persons by name, ignoring case and accents (best match first)"""
+    service = PersonaService(db)
+
+    try:
+        page = await service.search_persons(q, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SearchUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return {"personas": page.items, "next_cursor": page.next_cursor}
+
+@router.get("/lookup", response_model=IdentificacionLookupResult)
+async def lookup_identificaciones(prefix: str = Query(..., min_length=1, max_length=30,
+                                                      description="Beginning of an identification number"),
+                                  limit: int = Query(10, ge=1, le=50),
+                                  current_user: Principal = Depends(get_current_user)):
+    """Typeahead of identification numbers, served from this worker's memory
+
+    No database session: the index reads through its own sessions.
+    """
+    matches = await identificacion_index.lookup(prefix, limit)
+    return {"items": [{"numero": numero, "persona_id": persona_id}
+                      for numero, persona_id in matches]}
+
 @router.get("/{persona_id}", response_model=PersonaResponse)
-async def get_person(persona_id: int, db: AsyncSession = Depends(get_db),
-                     current_user: User = Depends(get_current_user)):
+async def get_person(persona_id: int, db: AsyncSession = Depends(get_read_db, scope="function"),
+                     current_user: Principal = Depends(get_current_user)):
     """Get a person for id"""
     service = PersonaService(db)
 
@@ -58,10 +158,9 @@ async def get_person(persona_id: int, db: AsyncSession = Depends(get_db),
 
 @router.put("/{persona_id}", response_model=PersonaResponse)
 async def update_person(persona_id: int, data: PersonaUpdate, db: AsyncSession = Depends(get_db),
-                        current_user: User = Depends(get_current_user)):
+                        current_user: Principal = Depends(get_current_user)):
     """Update a person"""
     service = PersonaService(db)
-    persona = await service.get_persona(persona_id)
 
     try:
         persona = await service.update_persona(persona_id, data)
@@ -75,7 +174,7 @@ async def update_person(persona_id: int, data: PersonaUpdate, db: AsyncSession =
 
 @router.delete("/{persona_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_person(persona_id: int, db: AsyncSession = Depends(get_db),
-                        current_user: User = Depends(get_current_user)):
+                        current_user: Principal = Depends(get_current_user)):
     """Delete a person"""
     service = PersonaService(db)
     persona = await service.delete_person(persona_id)
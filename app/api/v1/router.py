@@ -3,10 +3,12 @@ from fastapi import APIRouter
 from app.api.v1.users import router as users_router
 from app.api.v1.auth import router as auth_router
 from app.api.v1.persona import router as persona_router
+from app.api.v1.admin import router as admin_router
 
 api_router = APIRouter(prefix="/api/v1")
 
 api_router.include_router(users_router)
 api_router.include_router(auth_router)
 api_router.include_router(persona_router)
+api_router.include_router(admin_router)
 
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserList
+from app.core.batch import BatchValidationError
+from app.core.pagination import CountStrategy
+from app.database import get_db, get_read_db
+from app.schemas.user import (UserCreate, UserUpdate, UserResponse, UserList, UserBatchCreate,
+                              UserBatchResponse)
 from app.services.user_service import UserService
-from app.models.user import User, UserRole
+from app.models.user import UserRole
+from app.core.principal import Principal
 from app.core.dependencies import get_current_user, require_roles
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -12,7 +16,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(user_data: UserCreate,
                       db: AsyncSession = Depends(get_db),
-                      current_user: User = Depends(require_roles([UserRole.ADMIN]))):
+                      current_user: Principal = Depends(require_roles([UserRole.ADMIN]))):
     """Create new user."""
     service = UserService(db)
 
@@ -23,26 +27,52 @@ async def create_user(user_data: UserCreate,
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=str(e))
 
+@router.post("/batch", response_model=UserBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_users_batch(data: UserBatchCreate,
+                             db: AsyncSession = Depends(get_db),
+                             current_user: Principal = Depends(require_roles([UserRole.ADMIN]))):
+    """Create many users in one transaction (all or nothing)."""
+    service = UserService(db)
+
+    try:
+        users = await service.create_users(data.users)
+    except BatchValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail={"message": str(e), "errors": e.errors})
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=str(e))
+
+    return {"users": users, "total": len(users)}
+
 @router.get("/", response_model=UserList)
-async def get_users(skip: int = 0, limit: int = 10,
-                    db: AsyncSession = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
-    """Get all users."""
+async def get_users(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100),
+                    after: str | None = Query(None, description="next_cursor of the previous page"),
+                    count: CountStrategy = Query(CountStrategy.EXACT,
+                                                 description="How the total is computed"),
+                    db: AsyncSession = Depends(get_read_db, scope="function"),
+                    current_user: Principal = Depends(get_current_user)):
+    """Get all users (pass next_cursor as after for the next page)."""
     service = UserService(db)
 
-    users = await service.get_users(skip=skip, limit=limit)
-    total = await service.count_users()
+    try:
+        page = await service.get_users_page(limit=limit, after=after, skip=skip, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=str(e))
 
     return {
-        "users": users,
-        "total": total,
+        "users": page.items,
+        "total": page.total,
+        "total_exact": page.total_exact,
         "page": (skip // limit) + 1,
-        "per_page": limit
+        "per_page": limit,
+        "next_cursor": page.next_cursor,
     }
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: AsyncSession = Depends(get_db),
-                   current_user: User = Depends(get_current_user)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_db, scope="function"),
+                   current_user: Principal = Depends(get_current_user)):
     """Get user for given id."""
     service = UserService(db)
     user = await service.get_user(user_id)
@@ -58,7 +88,7 @@ async def get_user(user_id: int, db: AsyncSession = Depends(get_db),
 async def update_user(user_id: int,
                       user_data: UserUpdate,
                       db: AsyncSession = Depends(get_db),
-                      current_user: User = Depends(get_current_user)):
+                      current_user: Principal = Depends(get_current_user)):
     """Update user. User can editar a si mismo, ADMIN puede editar a todos"""
     #Verificar permisos
     if current_user.id != user_id and current_user.role != UserRole.ADMIN:
@@ -82,7 +112,7 @@ async def update_user(user_id: int,
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(user_id: int,
                       db: AsyncSession = Depends(get_db),
-                      current_user: User = Depends(require_roles([UserRole.ADMIN]))):
+                      current_user: Principal = Depends(require_roles([UserRole.ADMIN]))):
     #Delete user only admin
     if current_user.id == user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,11 +11,102 @@ class Settings(BaseSettings):
 
     #Base de datos
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_RECYCLE: int = -1
+    # Prepared statements kept per connection by the asyncpg driver
+    # (0 disables them, e.g. behind pgbouncer in transaction mode)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Compiled SQL kept per engine by SQLAlchemy
+    DB_QUERY_CACHE_SIZE: int = 500
+    # Print every SQL statement (local debugging only, it is slow)
+    DB_ECHO: bool = False
+
+    # Time budget per request (0 disables it); the remaining budget becomes
+    # the statement_timeout of the request's write transaction
+    REQUEST_TIMEOUT_SECONDS: float = 30
+
+    # Bulk writes: rows per statement and items accepted per batch request
+    BULK_CHUNK_SIZE: int = 1000
+    PERSONA_BATCH_MAX_ITEMS: int = 5000
+
+    # GET /persona/search pages through at most this many best matches
+    PERSONA_SEARCH_MAX_MATCHES: int = 100
+    USER_BATCH_MAX_ITEMS: int = 100
+
+    # Cached list totals (count=cached); other workers' writes show up after the TTL
+    COUNT_CACHE_SIZE: int = 1000
+    COUNT_CACHE_TTL_SECONDS: float = 30
+
+    # In-memory typeahead of identification numbers (GET /persona/lookup):
+    # loaded at startup, refreshed from the primary every few seconds, rebuilt
+    # every IDENTIFICACION_INDEX_RELOAD_SECONDS and compacted once the pending
+    # changes exceed IDENTIFICACION_INDEX_MAX_DELTA
+    IDENTIFICACION_INDEX_PRELOAD: bool = True
+    IDENTIFICACION_INDEX_REFRESH_SECONDS: float = 5
+    IDENTIFICACION_INDEX_RELOAD_SECONDS: float = 3600
+    IDENTIFICACION_INDEX_MAX_DELTA: int = 10000
+
+    # Archival of soft-deleted rows (python -m app.scripts.archive): rows
+    # inactive for longer than the retention move to the <table>_archive
+    # tables, one short transaction per batch with a pause in between
+    ARCHIVE_RETENTION_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+    ARCHIVE_LOCK_TIMEOUT_MS: int = 2000
+
+    # SQL timing: statements slower than the threshold are logged
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SQL_STATS_MAX_STATEMENTS: int = 500
+    # Startup schema handling: "verify" (check the Alembic revision),
+    # "create_all" (local development only) or "off"
+    DB_SCHEMA_MODE: Literal["verify", "create_all", "off"] = "verify"
+
+    # Optional read replica used by read-only endpoints
+    DATABASE_READ_URL: str | None = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5
+    READ_REPLICA_CHECK_SECONDS: float = 2
+    # Longest a request waits for the lag check (connect included)
+    READ_REPLICA_CHECK_TIMEOUT_SECONDS: float = 1
 
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = 'HS256'
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_NEGATIVE_CACHE_SIZE: int = 1000
+    TOKEN_NEGATIVE_CACHE_SECONDS: float = 5
+
+    # Token revocation (logout)
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_REFRESH_SECONDS: float = 5
+
+    # Login attempts per sliding window, checked before any DB lookup
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_SLOTS: int = 524288
+    # Reverse proxies (IPs or CIDRs, JSON list) whose X-Forwarded-For is
+    # trusted for the client address; empty uses the peer address as is
+    TRUSTED_PROXIES: list[str] = []
+
+    # Password hashing (bcrypt runs on a dedicated thread pool)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # Fixed bcrypt cost; when unset it is calibrated at startup to meet
+    # PASSWORD_HASH_TARGET_MS. Pin it in production so every worker agrees.
+    BCRYPT_ROUNDS: int | None = None
+    PASSWORD_HASH_TARGET_MS: float = 100
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 15
+
+    # Authenticated principal cache used by get_current_user
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
 
     #class Config:
      #   env_file = ".env"
@@ -0,0 +1,13 @@
+from collections.abc import Iterator, Sequence
+
+class BatchValidationError(ValueError):
+    """A batch was rejected; errors holds one entry per failing item"""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(f"{len(errors)} item(s) failed validation, nothing was written")
+        self.errors = errors
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    """Consecutive slices of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,49 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import Histogram
+
+class PoolMetrics:
+    """Counters collected from one connection pool"""
+
+    def __init__(self):
+        self.wait = Histogram()
+        self.timeouts = 0
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.wait.observe((time.perf_counter() - start) * 1000)
+
+def instrumented_pool_class(metrics: PoolMetrics) -> type[InstrumentedAsyncPool]:
+    """Pool class bound to its metrics (survives engine.dispose())"""
+    return type("InstrumentedAsyncPool", (InstrumentedAsyncPool,), {"metrics": metrics})
+
+def pool_snapshot(engine: AsyncEngine) -> dict:
+    """Current pool occupancy plus collected wait times"""
+    pool = engine.pool
+    snapshot = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    if isinstance(pool, InstrumentedAsyncPool):
+        snapshot["timeouts"] = pool.metrics.timeouts
+        snapshot["wait_ms"] = pool.metrics.wait.snapshot()
+    return snapshot
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+
+#Absolute deadline (time.monotonic()) of the request being served
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+# Client-requested budget, capped by the server budget
+DEADLINE_HEADER = b"x-request-timeout"
+
+class DeadlineExceededError(Exception):
+    """The request ran out of its time budget"""
+
+class DeadlineMetrics:
+    """Requests stopped before completing"""
+
+    def __init__(self):
+        self.deadline_exceeded = 0
+        self.client_disconnects = 0
+        self.statement_timeouts = 0
+        self.pool_timeouts = 0
+
+    def stats(self) -> dict:
+        return {
+            "deadline_exceeded": self.deadline_exceeded,
+            "client_disconnects": self.client_disconnects,
+            "statement_timeouts": self.statement_timeouts,
+            "pool_timeouts": self.pool_timeouts,
+        }
+
+deadline_metrics = DeadlineMetrics()
+
+def remaining_seconds() -> float | None:
+    """Time left for the current request (None outside requests)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def _request_budget(scope, default: float) -> float:
+    for name, value in scope.get("headers", ()):
+        if name == DEADLINE_HEADER:
+            try:
+                requested = float(value)
+            except ValueError:
+                break
+            if requested > 0:
+                return min(requested, default)
+            break
+    return default
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware that gives every request a time budget
+
+    The endpoint runs in its own task: it is cancelled when the budget
+    runs out (504) or when the client disconnects before the response
+    is complete, which also cancels any query it is waiting on.
+    """
+
+    def __init__(self, app, timeout_seconds: float):
+        self.app = app
+        self.timeout_seconds = timeout_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.timeout_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        budget = _request_budget(scope, self.timeout_seconds)
+        token = _deadline.set(time.monotonic() + budget)
+        try:
+            await self._run(scope, receive, send, budget)
+        finally:
+            _deadline.reset(token)
+
+    async def _run(self, scope, receive, send, budget: float) -> None:
+        messages: asyncio.Queue = asyncio.Queue()
+        response_started = False
+        response_complete = False
+
+        async def watch_receive():
+            # Owns the real receive so a disconnect is seen while the endpoint runs
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def send_wrapper(message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        app_task = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+        watcher = asyncio.create_task(watch_receive())
+        try:
+            done, _ = await asyncio.wait({app_task, watcher}, timeout=budget,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if watcher in done and app_task not in done and response_complete:
+                # Normal end of the exchange: let the endpoint finish its cleanup
+                await app_task
+                return
+            if app_task in done:
+                app_task.result()
+                return
+
+            app_task.cancel()
+            try:
+                await app_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+            if watcher in done:
+                deadline_metrics.client_disconnects += 1
+                return
+            deadline_metrics.deadline_exceeded += 1
+            if not response_started:
+                await _send_timeout_response(send)
+        finally:
+            watcher.cancel()
+
+async def _send_timeout_response(send) -> None:
+    body = json.dumps({"detail": "Request deadline exceeded"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -2,17 +2,18 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.principal import Principal, principal_cache
+from app.core.revocation import revocation_list
 from app.core.security import decode_token
 from app.database import get_db
 from app.models import UserRole
-from app.models.user import User
 from app.repositories.user_repository import UserRepository
 
 # Esquema de seguridad Bearer
 security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
-                           db: AsyncSession = Depends(get_db)) -> User:
+                           db: AsyncSession = Depends(get_db)) -> Principal:
     """Obtain current user"""
     """Obtiene el usuario actual a partir del token JWT"""
     token = credentials.credentials
@@ -33,8 +34,21 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    jti = payload.get("jti")
+    if jti is not None and await revocation_list.is_revoked(db, jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    user_id = int(user_id)
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
     repository = UserRepository(db)
-    user = await repository.get_by_id(int(user_id))
+    user = await repository.get_by_id(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,12 +56,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(user_id, principal)
+    return principal
 
 #Proteger endpoints
 def require_roles(allowed_roles: list[UserRole]):
     """Crea una dependencia que verifica si el usuario tiene uno de los roles"""
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
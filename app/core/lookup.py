@@ -0,0 +1,306 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.core.pagination import on_tables_committed
+from app.database import AsyncSessionLocal
+from app.repositories.persona_repository import IdentificacionRepository
+
+# updated_at is the start of the writing transaction, which commits later, so
+# each refresh re-reads a window behind the previous watermark. Request
+# transactions end with their deadline; longer ones (scripts, manual SQL)
+# can be missed until the next full reload
+_REFRESH_MARGIN = timedelta(seconds=max(60, 2 * settings.REQUEST_TIMEOUT_SECONDS))
+
+# A failed full reload is retried after this long, not on the next lookup
+_RELOAD_RETRY_SECONDS = 60
+
+# Tables whose commits can change the index
+_TABLES = frozenset({"persona", "identificacion"})
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+class PackedPrefixIndex:
+    """Immutable sorted byte keys mapped to ints, searched by bisection
+
+    Key i is blob[offsets[i]:offsets[i + 1]] and maps to values[i]: three
+    flat buffers instead of a Python object per entry.
+    """
+
+    __slots__ = ("_blob", "_offsets", "_values")
+
+    def __init__(self, blob: bytes, offsets: array, values: array):
+        self._blob = blob
+        self._offsets = offsets
+        self._values = values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def key(self, i: int) -> bytes:
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+    def _lower_bound(self, key: bytes) -> int:
+        low, high = 0, len(self._values)
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get(self, key: bytes) -> int | None:
+        i = self._lower_bound(key)
+        if i < len(self._values) and self.key(i) == key:
+            return self._values[i]
+        return None
+
+    def scan(self, prefix: bytes):
+        """(key, value) of the keys starting with prefix, in order"""
+        for i in range(self._lower_bound(prefix), len(self._values)):
+            key = self.key(i)
+            if not key.startswith(prefix):
+                return
+            yield key, self._values[i]
+
+    def items(self):
+        for i in range(len(self._values)):
+            yield self.key(i), self._values[i]
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self._blob) + self._offsets.itemsize * len(self._offsets)
+                + self._values.itemsize * len(self._values))
+
+class PackedPrefixIndexBuilder:
+    """Appends (key, value) pairs given in strictly increasing key order"""
+
+    def __init__(self):
+        self._blob = bytearray()
+        self._offsets = array("I", [0])
+        self._values = array("q")
+        self._last: bytes | None = None
+
+    def add(self, key: bytes, value: int) -> None:
+        if self._last is not None and key <= self._last:
+            raise ValueError("Keys must be added in increasing byte order")
+        self._blob += key
+        self._offsets.append(len(self._blob))
+        self._values.append(value)
+        self._last = key
+
+    def build(self) -> PackedPrefixIndex:
+        return PackedPrefixIndex(bytes(self._blob), self._offsets, self._values)
+
+def _merge(base: PackedPrefixIndex, delta: list[tuple[bytes, int | None]]) -> PackedPrefixIndex:
+    """New base with the delta applied (None removes the key)"""
+    changed = {key for key, _ in delta}
+    builder = PackedPrefixIndexBuilder()
+    kept = ((key, value) for key, value in base.items() if key not in changed)
+    for key, value in heapq.merge(kept, delta, key=itemgetter(0)):
+        if value is not None:
+            builder.add(key, value)
+    return builder.build()
+
+class IdentificacionIndex:
+    """Per-worker typeahead: active identification numbers -> persona id
+
+    A packed, sorted base plus a small sorted delta of the changes seen
+    since it was built (None marks a removal), merged into a new base once
+    it outgrows max_delta. Other workers' writes arrive with the periodic
+    refresh; a commit of this worker marks the index stale so the next
+    lookup refreshes first. Every reload_seconds the whole index is rebuilt
+    in the background, which bounds how long a change missed by the
+    incremental refresh stays wrong. Numbers are matched byte for byte.
+
+    The index reads through its own sessions on the primary: the full load
+    needs a transaction (server-side cursor) and a lagging replica would
+    move the watermark past rows it has not replayed yet.
+    """
+
+    def __init__(self, refresh_seconds: float, max_delta: int, reload_seconds: float,
+                 session_factory: async_sessionmaker = AsyncSessionLocal):
+        self.refresh_seconds = refresh_seconds
+        self.max_delta = max_delta
+        self.reload_seconds = reload_seconds
+        self._session_factory = session_factory
+        self._base = PackedPrefixIndexBuilder().build()
+        self._delta: dict[bytes, int | None] = {}
+        self._delta_keys: list[bytes] = []
+        self._watermark: datetime | None = None
+        self._refreshed_at: float | None = None
+        self._loaded_at: float | None = None
+        self._reload_task: asyncio.Task | None = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self.lookups = 0
+        self.refreshes = 0
+        self.reloads = 0
+        self.reload_failures = 0
+        self.compactions = 0
+        self.load_ms = 0.0
+
+    async def load(self) -> None:
+        """Build the base from every active identification"""
+        started = time.perf_counter()
+        self._stale = False
+        builder = PackedPrefixIndexBuilder()
+        async with self._session_factory() as session:
+            repository = IdentificacionRepository(session)
+            watermark = await repository.now()
+            async for rows in repository.stream_active_numeros():
+                for numero, persona_id in rows:
+                    builder.add(numero.encode(), persona_id)
+
+        self._base = builder.build()
+        self._delta.clear()
+        self._delta_keys.clear()
+        self._watermark = watermark
+        self._refreshed_at = self._loaded_at = time.monotonic()
+        self.load_ms = (time.perf_counter() - started) * 1000
+
+    async def refresh(self) -> None:
+        """Apply the changes committed since the last refresh"""
+        if self._watermark is None:
+            await self.load()
+            return
+
+        self._stale = False
+        async with self._session_factory() as session:
+            repository = IdentificacionRepository(session)
+            watermark = await repository.now()
+            rows = await repository.get_numeros_changed_since(self._watermark, _REFRESH_MARGIN)
+        for numero, persona_id, active in rows:
+            self._apply(numero.encode(), persona_id if active else None)
+        self._watermark = watermark
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+        if len(self._delta) > self.max_delta:
+            # Off the event loop: lookups keep reading the current base and delta
+            delta = [(key, self._delta[key]) for key in self._delta_keys]
+            self._base = await asyncio.to_thread(_merge, self._base, delta)
+            self._delta.clear()
+            self._delta_keys.clear()
+            self.compactions += 1
+
+    def _apply(self, key: bytes, persona_id: int | None) -> None:
+        if persona_id == self._base.get(key):
+            # Back to what the base holds (or a re-read of the refresh window)
+            if self._delta.pop(key, _MISSING) is not _MISSING:
+                del self._delta_keys[bisect.bisect_left(self._delta_keys, key)]
+            return
+        if key not in self._delta:
+            bisect.insort(self._delta_keys, key)
+        self._delta[key] = persona_id
+
+    def tables_committed(self, tables: set[str]) -> None:
+        """Commit listener: this worker changed personas or identifications"""
+        if not _TABLES.isdisjoint(tables):
+            self._stale = True
+
+    async def _reload(self) -> None:
+        async with self._lock:
+            if time.monotonic() - self._loaded_at < self.reload_seconds:
+                return  # reloaded while this task waited for the lock
+            try:
+                await self.load()
+            except Exception:
+                # Keep serving the current index and retry later
+                self.reload_failures += 1
+                self._loaded_at = time.monotonic() - max(0.0, self.reload_seconds - _RELOAD_RETRY_SECONDS)
+                logger.exception("Identification index reload failed")
+                return
+            self.reloads += 1
+
+    async def lookup(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """Refresh when due, then search"""
+        now = time.monotonic()
+        if self._refreshed_at is None:
+            # First load: every request waits for it
+            async with self._lock:
+                if self._refreshed_at is None:
+                    await self.load()
+        elif self._lock.locked():
+            pass  # a refresh or reload is running: answer from the current index
+        elif now - self._loaded_at >= self.reload_seconds:
+            # Requests keep reading the current index while it is rebuilt
+            if self._reload_task is None or self._reload_task.done():
+                self._reload_task = asyncio.create_task(self._reload())
+        elif self._stale or now - self._refreshed_at >= self.refresh_seconds:
+            async with self._lock:
+                await self.refresh()
+        return self.search(prefix, limit)
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """Up to limit (numero, persona_id) whose numero starts with prefix, in order"""
+        self.lookups += 1
+        key = prefix.encode()
+        delta = []
+        start = bisect.bisect_left(self._delta_keys, key)
+        for delta_key in islice(self._delta_keys, start, None):
+            if not delta_key.startswith(key):
+                break
+            delta.append((delta_key, self._delta[delta_key]))
+
+        matches = self._base.scan(key)
+        if delta:
+            matches = heapq.merge(((k, v) for k, v in matches if k not in self._delta),
+                                  delta, key=itemgetter(0))
+
+        result = []
+        for numero, persona_id in matches:
+            if persona_id is None:
+                continue
+            result.append((numero.decode(), persona_id))
+            if len(result) >= limit:
+                break
+        return result
+
+    def __len__(self) -> int:
+        entries = len(self._base)
+        for key, persona_id in self._delta.items():
+            entries += (persona_id is not None) - (self._base.get(key) is not None)
+        return entries
+
+    def stats(self) -> dict:
+        delta_bytes = (sys.getsizeof(self._delta) + sys.getsizeof(self._delta_keys)
+                       + sum(sys.getsizeof(key) for key in self._delta_keys))
+        entries = len(self)
+        return {
+            "entries": entries,
+            "base_entries": len(self._base),
+            "delta_entries": len(self._delta),
+            "base_bytes": self._base.nbytes,
+            "delta_bytes": delta_bytes,
+            "bytes_per_entry": round((self._base.nbytes + delta_bytes) / entries, 1) if entries else 0.0,
+            "lookups": self.lookups,
+            "refreshes": self.refreshes,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "compactions": self.compactions,
+            "load_ms": round(self.load_ms, 1),
+            "refreshed_seconds_ago": (round(time.monotonic() - self._refreshed_at, 1)
+                                      if self._refreshed_at is not None else None),
+        }
+
+#Identification index shared by every request of this worker
+identificacion_index = IdentificacionIndex(
+    refresh_seconds=settings.IDENTIFICACION_INDEX_REFRESH_SECONDS,
+    max_delta=settings.IDENTIFICACION_INDEX_MAX_DELTA,
+    reload_seconds=settings.IDENTIFICACION_INDEX_RELOAD_SECONDS,
+)
+on_tables_committed(identificacion_index.tables_committed)
@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+from enum import Enum
+from typing import Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import TTLCache
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor holding the sort key of the last row of a page"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str, size: int = 1) -> list:
+    """Sort key stored in a cursor; ValueError if it was not made by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+class CountStrategy(str, Enum):
+    """How a list response computes its total"""
+    EXACT = "exact"          # count in the same round-trip as the page
+    CACHED = "cached"        # per-worker cache, dropped when this worker writes the tables
+    ESTIMATED = "estimated"  # planner row estimate, no scan
+
+class Page:
+    """One page of a list plus the cursor of the next one"""
+
+    __slots__ = ("items", "next_cursor", "total", "total_exact")
+
+    def __init__(self, items: list, next_cursor: str | None, total: int | None,
+                 total_exact: bool):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_exact = total_exact
+
+class CountCache:
+    """Cached list totals, invalidated by the tables they were counted from"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._keys_by_table: dict[str, set[Hashable]] = {}
+
+    def get(self, key: Hashable) -> int | None:
+        return self._cache.get(key)
+
+    def set(self, key: Hashable, total: int, tables: tuple[str, ...]) -> None:
+        self._cache.set(key, total)
+        for table in tables:
+            self._keys_by_table.setdefault(table, set()).add(key)
+
+    def invalidate_tables(self, tables) -> None:
+        for table in tables:
+            for key in self._keys_by_table.pop(table, ()):
+                self._cache.invalidate(key)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+#Count cache shared by every request of this worker
+count_cache = CountCache(
+    maxsize=settings.COUNT_CACHE_SIZE,
+    ttl=settings.COUNT_CACHE_TTL_SECONDS,
+)
+
+_WRITTEN_TABLES = "written_tables"
+
+def mark_tables_written(session: Session, *tables: str) -> None:
+    """Record writes made outside the unit of work (Core insert/update)"""
+    session.info.setdefault(_WRITTEN_TABLES, set()).update(tables)
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        mark_tables_written(session, obj.__table__.name)
+
+#Called with the tables a committed transaction wrote
+_commit_listeners: list[Callable[[set[str]], None]] = [count_cache.invalidate_tables]
+
+def on_tables_committed(listener: Callable[[set[str]], None]) -> None:
+    """Run listener(tables) after every commit that wrote to tables"""
+    _commit_listeners.append(listener)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session: Session) -> None:
+    # After commit: a count read in between could otherwise cache the old total
+    tables = session.info.pop(_WRITTEN_TABLES, None)
+    if tables:
+        for listener in _commit_listeners:
+            listener(tables)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tables(session: Session) -> None:
+    session.info.pop(_WRITTEN_TABLES, None)
@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.models.user import User, UserRole
+
+class Principal:
+    """Authenticated user as seen by the endpoints (no ORM state)"""
+
+    __slots__ = ("id", "email", "role", "is_active")
+
+    def __init__(self, id: int, email: str, role: UserRole, is_active: bool = True):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user.id, user.email, UserRole(user.role), user.is_active)
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, email={self.email!r}, role={self.role.value})"
+
+#Principal cache shared by every request of this worker
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+#session.info key: ids of the users changed by the open transaction
+_CHANGED_PRINCIPALS = "changed_principals"
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget a cached principal after its user changed"""
+    principal_cache.invalidate(user_id)
+
+def invalidate_principal_on_commit(session: Session, user_id: int) -> None:
+    """Forget a cached principal once the session commits its change"""
+    session.info.setdefault(_CHANGED_PRINCIPALS, set()).add(user_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session: Session) -> None:
+    # After commit: a request reading the user in between would cache the old row again
+    for user_id in session.info.pop(_CHANGED_PRINCIPALS, ()):
+        invalidate_principal(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_principals(session: Session) -> None:
+    session.info.pop(_CHANGED_PRINCIPALS, None)
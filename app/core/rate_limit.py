@@ -0,0 +1,174 @@
+import ipaddress
+import math
+import time
+from array import array
+
+from fastapi import Request
+
+from app.config import settings
+
+_TAG_BITS = 20
+_COUNT_BITS = 10
+_TAG_MASK = (1 << _TAG_BITS) - 1
+_COUNT_MASK = (1 << _COUNT_BITS) - 1
+_PREV_SHIFT = _TAG_BITS
+_CUR_SHIFT = _TAG_BITS + _COUNT_BITS
+_WINDOW_SHIFT = _TAG_BITS + 2 * _COUNT_BITS
+
+class SlidingWindowLimiter:
+    """Sliding-window counter limiter with a fixed-size hash table
+
+    Each key takes one 8-byte slot packing the window number, the
+    current and previous window counts and a 20-bit tag of the key
+    hash. Slots from expired windows are reused, so memory never grows
+    past the table size. Live counters are never evicted: a key whose
+    probed slots are all live is refused (fails closed) until one expires.
+    """
+
+    PROBES = 4
+
+    def __init__(self, limit: int, window_seconds: float, slots: int):
+        if not 0 < limit < _COUNT_MASK:
+            raise ValueError(f"limit must be between 1 and {_COUNT_MASK - 1}")
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.rejected = 0
+        self.saturated = 0
+        self._slots = slots
+        self._table = array("Q", bytes(8 * slots))
+        self._epoch = time.monotonic()
+
+    def _find_slot(self, key: str, window: int) -> tuple[int | None, int]:
+        """Slot of key, else a free or expired one (None when all are live)"""
+        digest = hash(key) & 0xFFFFFFFFFFFFFFFF
+        tag = (digest >> 44) or 1
+        base = digest % self._slots
+
+        free = None
+        for probe in range(self.PROBES):
+            index = (base + probe) % self._slots
+            value = self._table[index]
+            if value & _TAG_MASK == tag:
+                return index, tag
+            if free is None and (value == 0 or value >> _WINDOW_SHIFT < window - 1):
+                free = index
+        return free, tag
+
+    def hit(self, key: str, now: float | None = None) -> float:
+        """Count an attempt for key: 0 if allowed, otherwise seconds to wait"""
+        return self._attempt(key, now, count=True)
+
+    def check(self, key: str, now: float | None = None) -> float:
+        """Like hit, but an allowed attempt is not counted"""
+        return self._attempt(key, now, count=False)
+
+    def _attempt(self, key: str, now: float | None, count: bool) -> float:
+        now = time.monotonic() if now is None else now
+        position = (now - self._epoch) / self.window_seconds
+        window = int(position) + 1
+        fraction = position - int(position)
+
+        index, tag = self._find_slot(key, window)
+        if index is None:
+            # Overwriting a live slot would reset another key's lockout
+            self.rejected += 1
+            self.saturated += 1
+            return (1 - fraction) * self.window_seconds
+        # A free or expired slot reads as zero counts; it is only written on a hit
+        value = self._table[index]
+        stored_window = value >> _WINDOW_SHIFT
+        current = (value >> _CUR_SHIFT) & _COUNT_MASK
+        previous = (value >> _PREV_SHIFT) & _COUNT_MASK
+        if stored_window == window - 1:
+            previous, current = current, 0
+        elif stored_window != window:
+            previous = current = 0
+
+        if previous * (1 - fraction) + current + 1 > self.limit:
+            self.rejected += 1
+            return self._retry_after(previous, current, fraction)
+        if not count:
+            return 0
+
+        current += 1
+        self._table[index] = ((window << _WINDOW_SHIFT) | (current << _CUR_SHIFT)
+                              | (previous << _PREV_SHIFT) | tag)
+        return 0
+
+    def _retry_after(self, previous: int, current: int, fraction: float) -> float:
+        if current + 1 <= self.limit:
+            # Wait for the previous window to slide out enough
+            needed = 1 - (self.limit - current - 1) / previous
+            return (needed - fraction) * self.window_seconds
+        # Wait for the next window, where this one becomes "previous"
+        needed = 1 - (self.limit - 1) / current
+        return (1 - fraction + needed) * self.window_seconds
+
+    def stats(self) -> dict:
+        window = int((time.monotonic() - self._epoch) / self.window_seconds) + 1
+        live = sum(1 for value in self._table if value and value >> _WINDOW_SHIFT >= window - 1)
+        return {
+            "limit": self.limit,
+            "window_seconds": self.window_seconds,
+            "slots": self._slots,
+            "live_keys": live,
+            "table_bytes": self._table.itemsize * len(self._table),
+            "rejected": self.rejected,
+            "saturated": self.saturated,
+        }
+
+#Login limiters shared by every request of this worker
+login_ip_limiter = SlidingWindowLimiter(
+    limit=settings.LOGIN_RATE_LIMIT_PER_IP,
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    slots=settings.LOGIN_RATE_LIMIT_SLOTS,
+)
+login_email_limiter = SlidingWindowLimiter(
+    limit=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    slots=settings.LOGIN_RATE_LIMIT_SLOTS,
+)
+
+_trusted_proxies = [ipaddress.ip_network(proxy) for proxy in settings.TRUSTED_PROXIES]
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_proxies)
+
+def get_client_ip(request: Request) -> str | None:
+    """Address of the client, seen through the trusted proxies
+
+    X-Forwarded-For is only read when the peer is a trusted proxy; the
+    first hop from the right that is not one is the client (the entries to
+    its left are whatever the client chose to send).
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",")]
+    for hop in reversed(hops):
+        if hop and not _is_trusted_proxy(hop):
+            return hop
+    return peer
+
+def check_login_attempt(email: str, client_ip: str | None) -> int:
+    """Count a login attempt: 0 if allowed, otherwise Retry-After seconds
+
+    Both limiters are checked before either counts, so an attempt refused
+    for its email does not use up the client's IP budget (or the reverse).
+    """
+    now = time.monotonic()
+    email = email.strip().lower()
+    wait = login_email_limiter.check(email, now)
+    if client_ip:
+        wait = max(wait, login_ip_limiter.check(client_ip, now))
+    if wait:
+        return max(1, math.ceil(wait))
+
+    if client_ip:
+        login_ip_limiter.hit(client_ip, now)
+    login_email_limiter.hit(email, now)
+    return 0
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.repositories.token_repository import RevokedTokenRepository
+
+# Revocations commit a moment after their created_at, so each refresh
+# re-reads a short window behind the newest row already seen
+_REFRESH_MARGIN = timedelta(seconds=60)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on blake2b)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+class RevocationList:
+    """Per-worker view of the revoked tokens
+
+    Tokens absent from the Bloom filter are answered without I/O; only
+    filter hits are confirmed against the database.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._watermark: datetime | None = None
+        self._refreshed_at: float | None = None
+        self._lock = asyncio.Lock()
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Add revocations created since the last refresh"""
+        repository = RevokedTokenRepository(db)
+        rows = await repository.get_revoked_since(self._watermark, _REFRESH_MARGIN)
+
+        if self._filter.count + len(rows) > self._filter.capacity:
+            # Full: rebuild from the unexpired revocations with room to grow
+            rows = await repository.get_revoked_since(None, _REFRESH_MARGIN)
+            capacity = max(self._filter.capacity, 2 * len(rows))
+            self._filter = BloomFilter(capacity, self._error_rate)
+
+        for jti, created_at in rows:
+            if jti not in self._filter:
+                self._filter.add(jti)
+            self._watermark = created_at
+        self._refreshed_at = time.monotonic()
+
+    def add(self, jti: str) -> None:
+        """Record a revocation made by this worker"""
+        self._filter.add(jti)
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        """Verify if a jti was revoked"""
+        if self._refreshed_at is None:
+            # First load: every request waits for it
+            async with self._lock:
+                if self._refreshed_at is None:
+                    await self.refresh(db)
+        elif (time.monotonic() - self._refreshed_at >= self.refresh_seconds
+              and not self._lock.locked()):
+            async with self._lock:
+                await self.refresh(db)
+
+        self.checks += 1
+        if jti not in self._filter:
+            return False
+
+        self.filter_hits += 1
+        revoked = await RevokedTokenRepository(db).is_revoked(jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def stats(self) -> dict:
+        return {
+            "entries": self._filter.count,
+            "capacity": self._filter.capacity,
+            "filter_bytes": len(self._filter._bits),
+            "hashes": self._filter.hashes,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
+
+#Revocation list shared by every request of this worker
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+)
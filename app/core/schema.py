@@ -0,0 +1,30 @@
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+#Alembic head this code runs against. Update it with every new migration
+#(tests/test_schema.py checks it against migrations/versions).
+SCHEMA_REVISION = "0008"
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is not at the revision this code expects"""
+
+async def current_revisions(engine: AsyncEngine) -> set[str]:
+    """Revisions recorded in alembic_version (one query)"""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except ProgrammingError:
+            # The table does not exist: migrations never ran on this database
+            return set()
+        return set(result.scalars())
+
+async def verify_schema_version(engine: AsyncEngine) -> str:
+    """Refuse to start unless the database is at SCHEMA_REVISION"""
+    current = await current_revisions(engine)
+    if current != {SCHEMA_REVISION}:
+        raise SchemaVersionError(
+            f"Database schema at {sorted(current) or 'no revision'}, "
+            f"code expects {SCHEMA_REVISION}. Run 'alembic upgrade head'."
+        )
+    return SCHEMA_REVISION
@@ -1,3 +1,9 @@
+import asyncio
+import hashlib
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
 from jose import jwt, JWTError
@@ -5,6 +11,7 @@ from datetime import datetime, timedelta
 from datetime import timezone
 
 from app.config import settings
+from app.core.cache import TTLCache
 
 #Context for encrypting passwords
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -17,6 +24,96 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify password hash and return a new hash if its cost is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """Pick the highest bcrypt cost whose hash time stays within target_ms"""
+    sample_rounds = 8
+    sample_context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=sample_rounds)
+
+    elapsed = []
+    for _ in range(3):
+        start = time.perf_counter()
+        sample_context.hash("calibration-password")
+        elapsed.append(time.perf_counter() - start)
+    sample_ms = min(elapsed) * 1000
+
+    # Every extra round doubles the work
+    rounds = min_rounds
+    while rounds < max_rounds and sample_ms * 2 ** (rounds + 1 - sample_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+def configure_password_hashing(rounds: int | None = None) -> int:
+    """Set the bcrypt cost used for new hashes and as the rehash target"""
+    global pwd_context
+    if rounds is None:
+        rounds = settings.BCRYPT_ROUNDS
+    if rounds is None:
+        rounds = calibrate_bcrypt_rounds(settings.PASSWORD_HASH_TARGET_MS,
+                                         settings.BCRYPT_MIN_ROUNDS,
+                                         settings.BCRYPT_MAX_ROUNDS)
+
+    pwd_context = CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+    return rounds
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_pending = 0
+
+class PasswordHashingBusyError(RuntimeError):
+    """Raised when the password hashing queue is full"""
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return _hash_executor
+
+async def _run_in_hash_executor(func, *args):
+    """Run a hashing function on the pool, rejecting work beyond the queue limit"""
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHashingBusyError("Password hashing queue is full")
+
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """Encrypt password hash without blocking the event loop"""
+    return await _run_in_hash_executor(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password hash without blocking the event loop"""
+    return await _run_in_hash_executor(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str,
+                                           hashed_password: str) -> tuple[bool, str | None]:
+    """Verify password hash and rehash it if needed, off the event loop"""
+    return await _run_in_hash_executor(verify_and_update_password, plain_password, hashed_password)
+
+def shutdown_hash_executor() -> None:
+    """Stop the password hashing pool"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 # config JWT
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create a token JWT"""
@@ -28,14 +125,49 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", secrets.token_hex(16))
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
     return encoded_jwt
 
-def decode_token(token: str) -> dict | None:
-    """Decode token JWT"""
+def generate_refresh_token() -> str:
+    """Create an opaque refresh token"""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """Digest stored for a refresh token (high entropy, no slow hash needed)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+#Verified tokens live until their exp, rejected ones for a short time
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=0)
+invalid_token_cache = TTLCache(
+    maxsize=settings.TOKEN_NEGATIVE_CACHE_SIZE,
+    ttl=settings.TOKEN_NEGATIVE_CACHE_SECONDS,
+)
+
+def _decode_token_uncached(token: str) -> dict | None:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def decode_token(token: str) -> dict | None:
+    """Decode token JWT, memoizing the verification by token digest"""
+    key = hashlib.sha256(token.encode()).digest()
+
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+    if invalid_token_cache.get(key) is not None:
+        return None
+
+    payload = _decode_token_uncached(token)
+    if payload is None:
+        invalid_token_cache.set(key, True)
+        return None
+
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(key, dict(payload), ttl=exp - time.time())
+    return payload
\ No newline at end of file
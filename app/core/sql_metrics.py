@@ -0,0 +1,153 @@
+import logging
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+#ASGI scope of the request being served; FastAPI stores the matched route in it
+_current_scope: ContextVar[dict | None] = ContextVar("sql_request_scope", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_ARRAY_LIST = re.compile(r"\bARRAY\[\s*\?[^\]]*\]", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """Statement shape: literals and parameters as ?, IN lists and VALUES rows collapsed"""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _IN_LIST.sub("IN (...)", statement)
+    statement = _ARRAY_LIST.sub("ARRAY[...]", statement)
+    statement = _VALUES_ROWS.sub(r"\1, ...", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+def current_route() -> str | None:
+    """Route template of the request issuing SQL (None outside requests)"""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path")
+    return f"{scope.get('method', '')} {path}".strip()
+
+class RouteContextMiddleware:
+    """Pure ASGI middleware that exposes the request scope to the SQL timers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+class StatementStats:
+    """Aggregated timings of one normalized statement"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "slow", "routes")
+
+    MAX_ROUTES = 5
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.routes: dict[str, int] = {}
+
+    def snapshot(self, statement: str) -> dict:
+        return {
+            "statement": statement,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "slow": self.slow,
+            "routes": dict(sorted(self.routes.items(), key=lambda item: -item[1])),
+        }
+
+class SQLStats:
+    """Per-statement timings collected from engine cursor events"""
+
+    OTHER = "<other statements>"
+    ORDER_KEYS = ("total_ms", "mean_ms", "max_ms", "count", "slow")
+
+    def __init__(self, slow_threshold_ms: float, max_statements: int):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_statements = max_statements
+        self.statements: dict[str, StatementStats] = {}
+        self.executions = 0
+
+    def record(self, statement: str, elapsed_ms: float, route: str | None) -> None:
+        normalized = normalize_statement(statement)
+        stats = self.statements.get(normalized)
+        if stats is None:
+            # Bounded: once full, new shapes are pooled together
+            if len(self.statements) >= self.max_statements:
+                normalized = self.OTHER
+            stats = self.statements.setdefault(normalized, StatementStats())
+
+        self.executions += 1
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        if elapsed_ms > stats.max_ms:
+            stats.max_ms = elapsed_ms
+        if route is not None and (route in stats.routes
+                                  or len(stats.routes) < StatementStats.MAX_ROUTES):
+            stats.routes[route] = stats.routes.get(route, 0) + 1
+
+        if elapsed_ms >= self.slow_threshold_ms:
+            stats.slow += 1
+            logger.warning("Slow query (%.1f ms) route=%s: %s",
+                           elapsed_ms, route or "-", normalized)
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> list[dict]:
+        """The limit statements with the highest order_by value"""
+        if order_by not in self.ORDER_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(self.ORDER_KEYS)}")
+        snapshots = [stats.snapshot(statement) for statement, stats in self.statements.items()]
+        snapshots.sort(key=lambda item: item[order_by], reverse=True)
+        return snapshots[:limit]
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.executions = 0
+
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "statements": len(self.statements),
+            "max_statements": self.max_statements,
+            "slow_threshold_ms": self.slow_threshold_ms,
+        }
+
+def instrument_engine(engine: AsyncEngine, stats: SQLStats) -> None:
+    """Time every cursor execution of engine into stats"""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._sql_started_at = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, "_sql_started_at", None)
+        if started_at is not None:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            stats.record(statement, elapsed_ms, current_route())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
@@ -1,19 +1,178 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+import asyncio
+import logging
+import time
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
 from app.config import settings
+from app.core.db_metrics import PoolMetrics, instrumented_pool_class
+from app.core.deadline import DeadlineExceededError, deadline_metrics, remaining_seconds
+from app.core.sql_metrics import SQLStats, instrument_engine
+
+# Header a client sends right after a write to read from the primary
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG, #Muestra las consultas SQL en consola si DEBUG=True
+logger = logging.getLogger(__name__)
+
+#Statement timings shared by the primary and the replica engines
+sql_stats = SQLStats(
+    slow_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_statements=settings.SQL_STATS_MAX_STATEMENTS,
 )
 
+def _create_engine(url: str, metrics: PoolMetrics) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO, #Muestra las consultas SQL en consola si DB_ECHO=True
+        poolclass=instrumented_pool_class(metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        skip_autocommit_rollback=True, #read sessions run in AUTOCOMMIT
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args={"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+    )
+    instrument_engine(engine, sql_stats)
+    return engine
+
+primary_pool_metrics = PoolMetrics()
+engine = _create_engine(settings.DATABASE_URL, primary_pool_metrics)
+
+# The server cancels slow queries just before the middleware would, so the
+# connection goes back to the pool instead of being terminated
+_STATEMENT_TIMEOUT_MARGIN_SECONDS = 0.05
+
+# SQLSTATE raised by PostgreSQL when statement_timeout cancels a query
+_QUERY_CANCELED = "57014"
+
+class DeadlineSession(Session):
+    """Session whose transactions stop when the request deadline does"""
+
+@event.listens_for(DeadlineSession, "after_begin")
+def _apply_statement_timeout(session, transaction, connection) -> None:
+    remaining = remaining_seconds()
+    if remaining is None:
+        return
+    remaining -= _STATEMENT_TIMEOUT_MARGIN_SECONDS
+    if remaining <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+    # SET LOCAL: the timeout ends with the transaction, pooled connections stay clean
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+
 #Session Factory
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=DeadlineSession,
     expire_on_commit=False
 )
 
+#Read replica (optional)
+replica_pool_metrics = PoolMetrics()
+read_engine = (_create_engine(settings.DATABASE_READ_URL, replica_pool_metrics)
+               if settings.DATABASE_READ_URL else None)
+
+class ReadOnlySession(Session):
+    """Session for pure reads: never flushes pending changes"""
+
+    def flush(self, objects=None) -> None:
+        if self.new or self.deleted or self.dirty:
+            raise RuntimeError("Read-only session cannot write changes")
+
+def _read_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    # AUTOCOMMIT: no BEGIN/COMMIT round-trips around the SELECTs
+    return async_sessionmaker(
+        bind=bind.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        sync_session_class=ReadOnlySession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+#Read Session Factories (replica and primary fallback)
+AsyncPrimaryReadSessionLocal = _read_session_factory(engine)
+AsyncReadSessionLocal = (_read_session_factory(read_engine)
+                         if read_engine is not None else None)
+
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+class ReplicaMonitor:
+    """Periodically measures replica lag to decide where reads go
+
+    The check runs on the request that finds the last answer expired, so it
+    is bounded by check_timeout_seconds: an unreachable replica costs that
+    request at most the timeout and sends reads to the primary until the
+    next check.
+    """
+
+    def __init__(self, engine: AsyncEngine | None, max_lag_seconds: float, check_seconds: float,
+                 check_timeout_seconds: float):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self.check_timeout_seconds = check_timeout_seconds
+        self.lag_seconds: float | None = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.failed_checks = 0
+        self._usable = False
+        self._checked_at: float | None = None
+
+    async def is_usable(self) -> bool:
+        """Verify if the replica is reachable and within the lag budget"""
+        if self.engine is None:
+            return False
+
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+            return self._usable
+
+        # Claim the check first so concurrent requests reuse the last answer
+        self._checked_at = now
+        try:
+            lag = await asyncio.wait_for(self._measure_lag(), timeout=self.check_timeout_seconds)
+        except Exception as e:
+            self.failed_checks += 1
+            logger.warning("Replica lag check failed, reading from the primary: %r", e)
+            lag = None
+
+        self.lag_seconds = float(lag) if lag is not None else None
+        self._usable = self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
+        return self._usable
+
+    async def _measure_lag(self) -> float | None:
+        async with self.engine.connect() as conn:
+            return (await conn.execute(_REPLICA_LAG_SQL)).scalar()
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.engine is not None,
+            "usable": self._usable,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "failed_checks": self.failed_checks,
+        }
+
+replica_monitor = ReplicaMonitor(
+    read_engine,
+    max_lag_seconds=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.READ_REPLICA_CHECK_SECONDS,
+    check_timeout_seconds=settings.READ_REPLICA_CHECK_TIMEOUT_SECONDS,
+)
+
 #Base class for all models
 
 class Base(DeclarativeBase):
@@ -26,10 +185,37 @@ async def get_db():
         try:
             yield session
             await session.commit()
+        except DBAPIError as e:
+            await session.rollback()
+            if getattr(e.orig, "sqlstate", None) != _QUERY_CANCELED:
+                raise
+            # The statement_timeout derived from the request deadline fired
+            deadline_metrics.statement_timeouts += 1
+            raise DeadlineExceededError("Request deadline exceeded") from e
         except Exception:
             await session.rollback()
             raise
 
+async def get_read_db(request: Request):
+    """Generate a read-only, autocommit session for read-only endpoints.
+
+    Uses the replica when configured and fresh enough; falls back to the
+    primary when it lags or the client asks to read its own writes.
+    Declare it with Depends(get_read_db, scope="function") so the
+    connection goes back to the pool before the response is serialized.
+    """
+    use_replica = (AsyncReadSessionLocal is not None
+                   and READ_YOUR_WRITES_HEADER.lower() not in request.headers
+                   and await replica_monitor.is_usable())
+    if use_replica:
+        replica_monitor.replica_reads += 1
+        session_factory = AsyncReadSessionLocal
+    else:
+        replica_monitor.primary_reads += 1
+        session_factory = AsyncPrimaryReadSessionLocal
+
+    async with session_factory() as session:
+        yield session
+
 #Import models so that sqlalchemy registers them
 #from app.models import User
-
@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from app.config import settings
-from app.database import engine, Base, AsyncSessionLocal
+from app.core.security import (PasswordHashingBusyError, configure_password_hashing,
+                               shutdown_hash_executor)
+from app.core.lookup import identificacion_index
+from app.core.deadline import DeadlineExceededError, DeadlineMiddleware, deadline_metrics
+from app.core.schema import verify_schema_version
+from app.core.sql_metrics import RouteContextMiddleware
+from app.database import engine, read_engine, Base, AsyncSessionLocal
 from contextlib import asynccontextmanager
 from app.schemas import UserCreate, UserResponse
 from app.api.v1 import api_router
@@ -24,14 +32,29 @@ from fastapi.middleware.cors import CORSMiddleware
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     #Startup: run on start
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("Connected DataBase")
+    if settings.DB_SCHEMA_MODE == "verify":
+        revision = await verify_schema_version(engine)
+        print(f"Connected DataBase (schema revision {revision})")
+    elif settings.DB_SCHEMA_MODE == "create_all":
+        #Solo para desarrollo local: produccion usa 'alembic upgrade head'
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        print("Connected DataBase")
+    if settings.IDENTIFICACION_INDEX_PRELOAD:
+        await identificacion_index.load()
+        stats = identificacion_index.stats()
+        print(f"Identification index: {stats['entries']} numbers, "
+              f"{stats['base_bytes']} bytes, {stats['load_ms']} ms")
+    rounds = configure_password_hashing()
+    print(f"Bcrypt rounds: {rounds}")
 
     yield # Run Application
 
     #Shutdown: run on close
+    shutdown_hash_executor()
     await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
     print("Disconnected DataBase")
 
 app = FastAPI(
@@ -42,6 +65,7 @@ app = FastAPI(
 )
 
 #Middleware
+app.add_middleware(DeadlineMiddleware, timeout_seconds=settings.REQUEST_TIMEOUT_SECONDS)
 app.add_middleware(
     CORSMiddleware,
     #allow_origins=["http://localhost:5173"],  # tu frontend
@@ -50,7 +74,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RouteContextMiddleware)
 
+@app.exception_handler(PasswordHashingBusyError)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusyError):
+    """Shed load when too many password hashes are queued"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+    """The request used its whole time budget"""
+    deadline_metrics.deadline_exceeded += 1
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Request deadline exceeded"},
+    )
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """No database connection became free in time"""
+    deadline_metrics.pool_timeouts += 1
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database busy, try again"},
+        headers={"Retry-After": "1"},
+    )
 
 #Register routers
 app.include_router(api_router)
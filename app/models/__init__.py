@@ -10,6 +10,8 @@ from app.models.persona import (Persona,
                                 TipoIdentificacion,
                                 TipoContacto
                                 )
+from app.models.token import RevokedToken, RefreshToken
+from app.models.archive import archive_tables
 
 __all__ = [
     'BaseModel',
@@ -24,5 +26,8 @@ __all__ = [
     'TipoPersona',
     'TipoIdentificacion',
     'TipoContacto',
+    'RevokedToken',
+    'RefreshToken',
+    'archive_tables',
 
 ]
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Table, func
+
+from app.database import Base
+from app.models.persona import Cliente, Contacto, Empleado, Identificacion, Persona, Proveedor
+from app.models.user import User
+
+def _archive_table(model) -> Table:
+    """<table>_archive: the columns of the live table (generated ones aside),
+    without its foreign keys, unique constraints or indexes"""
+    columns = [Column(column.name, column.type, primary_key=column.primary_key,
+                      autoincrement=False, nullable=column.nullable)
+               for column in model.__table__.columns if column.computed is None]
+    return Table(f"{model.__tablename__}_archive", Base.metadata, *columns,
+                 Column("archived_at", DateTime, server_default=func.now(), nullable=False))
+
+#Soft-deleted rows moved out of the live tables by app.scripts.archive. Plain
+#tables, not models: the repositories only ever query the live tables
+archive_tables: dict[str, Table] = {
+    model.__tablename__: _archive_table(model)
+    for model in (Persona, Identificacion, Contacto, Cliente, Proveedor, Empleado, User)
+}
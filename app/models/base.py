@@ -9,6 +9,9 @@ class BaseModel(Base):
     """Base Model with audit fields for all models"""
 
     __abstract__ = True #Don't create the table, it's only used for inheritance
+    #INSERT/UPDATE ... RETURNING the server-generated columns (id, created_at,
+    #updated_at): no extra SELECT after a write
+    __mapper_args__ = {"eager_defaults": True}
 
     #id: Mapped[int] = mapped_column(primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
@@ -1,9 +1,26 @@
 from enum import Enum
 
-from sqlalchemy import String, Numeric, Integer, ForeignKey
+from sqlalchemy import (DDL, Computed, String, Numeric, Integer, ForeignKey, Index, Text, event,
+                        func, text)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import BaseModel
 
+# Plegado de tildes para la busqueda. translate() y lower() son IMMUTABLE, asi
+# sirven en una columna generada (unaccent() no lo es)
+_ACCENTED = "áàäâãéèëêíìïîóòöôõúùüûñçÁÀÄÂÃÉÈËÊÍÌÏÎÓÒÖÔÕÚÙÜÛÑÇ"
+_PLAIN = "aaaaaeeeeiiiiooooouuuuncAAAAAEEEEIIIIOOOOOUUUUNC"
+
+def fold_search_text(expression):
+    """SQL: lower case and without accents, as stored in persona.search_name"""
+    return func.lower(func.translate(expression, _ACCENTED, _PLAIN))
+
+def _pg_trgm_installed(ddl, target, bind, **kw) -> bool:
+    """create_all: the trigram index only once pg_trgm is installed"""
+    if bind is None:
+        return True  # rendering SQL offline
+    return bool(bind.exec_driver_sql(
+        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'").scalar())
+
 class TipoIdentificacion(str, Enum):
     """Identification Type"""
     RUC = "ruc"
@@ -24,6 +41,22 @@ class TipoContacto(str, Enum):
 
 class Persona(BaseModel):
     __tablename__ = "persona"
+    __table_args__ = (
+        # Listado por tipo: filtra y pagina (keyset en id) sobre el indice, solo activas
+        Index("ix_persona_activa_tipo_id", "tipo_persona", "id",
+              postgresql_where=text("is_active IS true")),
+        # Busqueda por nombre (GET /persona/search): trigramas de search_name.
+        # GiST ordena por distancia (KNN); la firma larga descarta pronto las
+        # paginas sin coincidencias
+        Index("ix_persona_search_name_gist", "search_name", postgresql_using="gist",
+              postgresql_ops={"search_name": "gist_trgm_ops(siglen=256)"}
+              ).ddl_if(dialect="postgresql", callable_=_pg_trgm_installed),
+        # Refresco incremental del indice de GET /persona/lookup
+        Index("ix_persona_updated_at", "updated_at"),
+        # Archivo (app.scripts.archive): solo las filas inactivas
+        Index("ix_persona_inactive_updated_at", "updated_at",
+              postgresql_where=text("is_active IS false")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     tipo_persona: Mapped[TipoPersona] = mapped_column(String(20), nullable=False)
@@ -51,6 +84,19 @@ class Persona(BaseModel):
     razon_social: Mapped[str | None] = mapped_column(String(400), nullable=True)
     nombre_comercial: Mapped[str | None] = mapped_column(String(400), nullable=True)
 
+    # Nombres y razon social juntos, en minusculas y sin tildes. La calcula
+    # Postgres en cada INSERT/UPDATE, tambien en las escrituras en lote
+    search_name: Mapped[str] = mapped_column(
+        Text,
+        Computed(
+            f"lower(translate(coalesce(nombre, '') || ' ' || coalesce(apellido, '') || ' ' || "
+            f"coalesce(razon_social, '') || ' ' || coalesce(nombre_comercial, ''), "
+            f"'{_ACCENTED}', '{_PLAIN}'))",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     # Tipo de persona
     #tipo: Mapped[TipoPersona] = mapped_column(String(30), nullable=False)
 
@@ -101,6 +147,15 @@ class Persona(BaseModel):
 class Identificacion(BaseModel):
     """Identificacion de una persona"""
     __tablename__ = "identificacion"
+    __table_args__ = (
+        # EXISTS de los listados y selectinload(Persona.identificacion)
+        Index("ix_identificacion_persona_id_is_active", "persona_id", "is_active"),
+        # Refresco incremental del indice de GET /persona/lookup
+        Index("ix_identificacion_updated_at", "updated_at"),
+        # Archivo (app.scripts.archive): solo las filas inactivas
+        Index("ix_identificacion_inactive_updated_at", "updated_at",
+              postgresql_where=text("is_active IS false")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     persona_id: Mapped[int] = mapped_column(ForeignKey("persona.id"), nullable=False)
@@ -116,10 +171,16 @@ class Identificacion(BaseModel):
 
 class Contacto(BaseModel):
     __tablename__ = "contacto"
+    __table_args__ = (
+        # Archivo (app.scripts.archive): solo las filas inactivas
+        Index("ix_contacto_inactive_updated_at", "updated_at",
+              postgresql_where=text("is_active IS false")),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    persona_id: Mapped[int] = mapped_column(ForeignKey("persona.id"), nullable=False)
-    tipo: Mapped[TipoIdentificacion] = mapped_column(String(30), nullable=False)
+    persona_id: Mapped[int] = mapped_column(ForeignKey("persona.id"), nullable=False, index=True)
+    tipo: Mapped[TipoContacto] = mapped_column(String(30), nullable=False)
     valor: Mapped[String] = mapped_column(String(300), nullable=False, unique=True, index=True)
+    es_principal: Mapped[bool] = mapped_column(default=False, nullable=False)
 
     #Relation
     persona: Mapped[Persona] = relationship(
@@ -189,10 +250,14 @@ class Empleado(BaseModel):
         back_populates="empleado"
     )
 
-
-
-
-
-
-
-
+# gist_trgm_ops viene de pg_trgm: create_all la instala antes del indice si el
+# servidor trae contrib; sin ella se crea la tabla sin el indice y
+# GET /persona/search no funciona (las migraciones si la exigen)
+event.listen(Persona.__table__, "before_create", DDL("""
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        END IF;
+    END $$
+""").execute_if(dialect="postgresql"))
@@ -1,5 +1,5 @@
 from enum import Enum
-from sqlalchemy import String
+from sqlalchemy import Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.models.base import BaseModel
 
@@ -15,6 +15,11 @@ class User(BaseModel):
     """User model of system"""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Archival (app.scripts.archive): inactive rows only
+        Index("ix_users_inactive_updated_at", "updated_at",
+              postgresql_where=text("is_active IS false")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from functools import cache
+
+from sqlalchemy import Insert, Integer, Interval, Select, any_, bindparam, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Base
+from app.models.archive import archive_tables
+from app.models.token import RefreshToken
+
+#Tables archived, in order: a persona takes every row that references it along
+ARCHIVED_TABLES = ("persona", "identificacion", "contacto", "users")
+
+#Rows moved to the archive together with the persona they reference
+_PERSONA_CHILDREN = ("identificacion", "contacto", "cliente", "proveedor", "empleado")
+
+#Credentials of archived users: deleted, not archived
+_DELETE_REFRESH_TOKENS = delete(RefreshToken).where(
+    RefreshToken.user_id == any_(bindparam("ids", type_=ARRAY(Integer))))
+
+@cache
+def _archivable_ids_statement(tablename: str) -> Select:
+    # SKIP LOCKED: rows a request holds are left for the next run
+    table = Base.metadata.tables[tablename]
+    return (select(table.c.id)
+            .where(table.c.is_active.is_(False),
+                   table.c.updated_at < func.localtimestamp() - bindparam("retention",
+                                                                          type_=Interval))
+            .limit(bindparam("limit"))
+            .with_for_update(skip_locked=True))
+
+@cache
+def _move_statement(tablename: str, key: str) -> Insert:
+    """WITH moved AS (DELETE ... WHERE key = ANY(:ids) RETURNING ...)
+    INSERT INTO <table>_archive SELECT ... FROM moved"""
+    table = Base.metadata.tables[tablename]
+    archive = archive_tables[tablename]
+    names = [column.name for column in archive.columns if column.name != "archived_at"]
+    moved = (delete(table)
+             .where(table.c[key] == any_(bindparam("ids", type_=ARRAY(Integer))))
+             .returning(*(table.c[name] for name in names))
+             .cte("moved"))
+    return insert(archive).from_select(names, select(*(moved.c[name] for name in names)))
+
+class ArchiveRepository:
+    """Moves soft-deleted rows from the live tables to the <table>_archive tables"""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def archive_batch(self, tablename: str, retention: timedelta, limit: int) -> dict[str, int]:
+        """Archive up to limit rows of tablename inactive for longer than retention,
+        plus the rows referencing them; rows moved per table"""
+        result = await self.db.execute(_archivable_ids_statement(tablename),
+                                       {"retention": retention, "limit": limit})
+        ids = list(result.scalars().all())
+        if not ids:
+            return {}
+
+        moved = {}
+        if tablename == "persona":
+            for child in _PERSONA_CHILDREN:
+                result = await self.db.execute(_move_statement(child, "persona_id"), {"ids": ids})
+                moved[child] = result.rowcount
+        elif tablename == "users":
+            await self.db.execute(_DELETE_REFRESH_TOKENS, {"ids": ids})
+        result = await self.db.execute(_move_statement(tablename, "id"), {"ids": ids})
+        moved[tablename] = result.rowcount
+        return moved
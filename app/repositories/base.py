@@ -1,11 +1,124 @@
+import json
+from functools import cache
 from typing import Generic, TypeVar, Type
-from sqlalchemy import select, func
+from sqlalchemy import (Integer, Select, Update, any_, bindparam, column, insert, select, func, text,
+                        update, values)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.core.batch import chunked
+from app.core.pagination import (CountStrategy, Page, count_cache, decode_cursor, encode_cursor,
+                                 mark_tables_written)
 from app.database import Base
+from app.repositories.loading import LoadProfile, apply_profile, load_options
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+#Hot statements are built once per model with bound parameters: executing the
+#same object reuses its memoized cache key and the compiled SQL
+@cache
+def _get_by_id_statement(model: Type[Base]) -> Select:
+    return select(model).where(model.id == bindparam("id"), model.is_active.is_(True))
+
+@cache
+def _get_active_ids_statement(model: Type[Base]) -> Select:
+    return select(model.id).where(model.id == any_(bindparam("ids", type_=ARRAY(Integer))),
+                                  model.is_active.is_(True))
+
+@cache
+def _soft_delete_many_statement(model: Type[Base]) -> Update:
+    # = ANY(array): one statement (and one prepared plan) whatever the number of ids
+    return (update(model)
+            .where(model.id == any_(bindparam("ids", type_=ARRAY(Integer))),
+                   model.is_active.is_(True))
+            .values(is_active=False)
+            .returning(model.id)
+            .execution_options(synchronize_session="fetch"))
+
+class PageQuery:
+    """Statements behind one paginated list
+
+    page is a keyset statement (after_id/skip/limit); rows selects the ids
+    matching the same filters and is what gets counted or estimated.
+    """
+
+    def __init__(self, name: str, page: Select, rows: Select, tables: tuple[str, ...]):
+        self.name = name
+        self.page = page
+        self.rows = rows
+        self.tables = tables
+        self.model = page.column_descriptions[0]["entity"]
+        self.count = select(func.count()).select_from(rows.subquery())
+        # Uncorrelated scalar subquery: evaluated once, same round-trip as the page
+        self.page_with_total = page.add_columns(self.count.scalar_subquery().label("total"))
+
+    async def estimate(self, db: AsyncSession, params: dict) -> int:
+        """Planner estimate of the matching rows (EXPLAIN, nothing is scanned)"""
+        statement = self.rows.params(**params).compile(
+            dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+        plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}"))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+@cache
+def _page_query(model: Type[Base]) -> PageQuery:
+    # Keyset on the primary key; after_id=0 with an offset serves the old skip mode
+    page = (select(model)
+            .where(model.id > bindparam("after_id"), model.is_active.is_(True))
+            .order_by(model.id)
+            .offset(bindparam("skip")).limit(bindparam("limit")))
+    rows = select(model.id).where(model.is_active.is_(True))
+    return PageQuery(model.__tablename__, page, rows, (model.__tablename__,))
+
+async def paginate(db: AsyncSession, query: PageQuery, params: dict, limit: int,
+                   after: str | None, skip: int,
+                   count: CountStrategy = CountStrategy.EXACT,
+                   profile: LoadProfile = LoadProfile.LIST) -> Page:
+    """Run a keyset page query, its total and the next cursor"""
+    after_id = decode_cursor(after)[0] if after else 0
+    if not isinstance(after_id, int):
+        raise ValueError("Invalid cursor")
+    page_params = {
+        **params,
+        "after_id": after_id,
+        "skip": 0 if after else skip,
+        "limit": limit + 1,  # one extra row tells whether a next page exists
+    }
+
+    total = None
+    cache_key = (query.name, *sorted(params.items()))
+    if count == CountStrategy.CACHED:
+        total = count_cache.get(cache_key)
+    with_total = count == CountStrategy.EXACT or (count == CountStrategy.CACHED and total is None)
+
+    if with_total:
+        rows = (await db.execute(apply_profile(query.page_with_total, query.model, profile),
+                                 page_params)).all()
+        items = [row[0] for row in rows]
+        if rows:
+            total = rows[0][1]
+        elif after is None and skip == 0:
+            total = 0
+        else:
+            # Past the end: no row carried the total
+            total = (await db.execute(query.count, params)).scalar_one()
+        if count == CountStrategy.CACHED:
+            count_cache.set(cache_key, total, query.tables)
+    else:
+        items = list((await db.execute(apply_profile(query.page, query.model, profile),
+                                       page_params)).scalars().all())
+
+    if count == CountStrategy.ESTIMATED:
+        total = await query.estimate(db, params)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].id)
+    return Page(items, next_cursor, total, total_exact=count == CountStrategy.EXACT)
+
 class BaseRepository(Generic[ModelType]):
     """Repository base con operaciones CRUD genericas"""
 
@@ -13,29 +126,36 @@ class BaseRepository(Generic[ModelType]):
         self.model = model
         self.db = db
 
-    async def get_by_id(self, id: int) -> ModelType | None:
+    async def get_by_id(self, id: int,
+                        profile: LoadProfile = LoadProfile.DETAIL) -> ModelType | None:
         """Gets one record by id"""
-        query = select(self.model).where(
-            self.model.id == id,
-            self.model.is_active.is_(True)
-        )
-        result = await self.db.execute(query)
+        statement = apply_profile(_get_by_id_statement(self.model), self.model, profile)
+        result = await self.db.execute(statement, {"id": id})
         return result.scalar_one_or_none()
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> list[ModelType]:
+    async def get_all(self, skip: int = 0, limit: int = 100,
+                      profile: LoadProfile = LoadProfile.LIST) -> list[ModelType]:
         """Retrieves all active records with pagination """
-        query = select(self.model).where(
-            self.model.is_active.is_(True)
-        ).offset(skip).limit(limit)
-        result = await self.db.execute(query)
+        statement = apply_profile(_page_query(self.model).page, self.model, profile)
+        result = await self.db.execute(statement, {"after_id": 0, "skip": skip, "limit": limit})
         return list(result.scalars().all())
 
+    async def get_page(self, limit: int = 100, after: str | None = None, skip: int = 0,
+                       count: CountStrategy = CountStrategy.EXACT,
+                       profile: LoadProfile = LoadProfile.LIST) -> Page:
+        """Page of active records ordered by id, plus the cursor of the next page.
+
+        With after the page starts right behind the cursor (skip is ignored),
+        so deep pages cost the same as the first one.
+        """
+        return await paginate(self.db, _page_query(self.model), {}, limit, after, skip, count,
+                              profile)
+
     async def create(self, obj_data: dict) -> ModelType:
         """Create a new record"""
         db_obj = self.model(**obj_data)
         self.db.add(db_obj)
-        await self.db.flush()
-        await self.db.refresh(db_obj)
+        await self.db.flush() #INSERT ... RETURNING id, created_at, updated_at
         return db_obj
 
     async def update(self, db_obj: ModelType, obj_data: dict) -> ModelType:
@@ -43,16 +163,90 @@ class BaseRepository(Generic[ModelType]):
         for field, value in obj_data.items():
             if value is not None:
                 setattr(db_obj, field, value)
-        await self.db.flush()
-        await self.db.refresh(db_obj)
+        await self.db.flush() #UPDATE ... RETURNING updated_at
         return db_obj
 
+    async def update_by_id(self, id: int, obj_data: dict,
+                           profile: LoadProfile = LoadProfile.DETAIL) -> ModelType | None:
+        """Update an active record by id with one UPDATE ... RETURNING, without loading it first
+
+        Only the non-None fields are set. None when no active record has that id.
+        """
+        changes = {field: value for field, value in obj_data.items() if value is not None}
+        if not changes:
+            return await self.get_by_id(id, profile)
+
+        statement = (update(self.model)
+                     .where(self.model.id == id, self.model.is_active.is_(True))
+                     .values(changes)
+                     .returning(self.model)
+                     .options(*load_options(self.model, profile))
+                     .execution_options(synchronize_session=False, populate_existing=True))
+        updated = (await self.db.scalars(statement)).one_or_none()
+        mark_tables_written(self.db.sync_session, self.model.__tablename__)
+        return updated
+
     async def delete(self, db_obj: ModelType) -> ModelType:
         """Soft delete - marked as inactive"""
         db_obj.is_active = False
         await self.db.flush()
         return db_obj
 
+    async def get_active_ids(self, ids: list[int]) -> set[int]:
+        """The ids of ids that belong to active records (one query)"""
+        result = await self.db.execute(_get_active_ids_statement(self.model), {"ids": ids})
+        return set(result.scalars().all())
+
+    async def create_many(self, rows: list[dict]) -> list[ModelType]:
+        """Create many records with multi-row INSERT ... RETURNING, in input order"""
+        statement = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        created = []
+        for chunk in chunked(rows, settings.BULK_CHUNK_SIZE):
+            result = await self.db.scalars(statement, list(chunk))
+            created.extend(result.all())
+        mark_tables_written(self.db.sync_session, self.model.__tablename__)
+        return created
+
+    async def update_many(self, rows: list[dict]) -> list[ModelType]:
+        """Update active records by id with UPDATE ... FROM (VALUES ...) RETURNING
+
+        Each row holds the id plus the fields to change (None values are
+        skipped, like update). Rows changing the same fields share a statement.
+        """
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for row in rows:
+            changes = {field: value for field, value in row.items() if value is not None}
+            groups.setdefault(tuple(sorted(changes)), []).append(changes)
+
+        table = self.model.__table__
+        updated = []
+        for keys, group in groups.items():
+            fields = [key for key in keys if key != "id"]
+            if not fields:
+                continue
+            for chunk in chunked(group, settings.BULK_CHUNK_SIZE):
+                data = (values(*(column(key, table.c[key].type) for key in keys), name="data")
+                        .data([tuple(row[key] for key in keys) for row in chunk]))
+                statement = (update(self.model)
+                             .where(self.model.id == data.c.id, self.model.is_active.is_(True))
+                             .values({field: data.c[field] for field in fields})
+                             .returning(self.model)
+                             .execution_options(synchronize_session=False,
+                                                populate_existing=True))
+                updated.extend((await self.db.scalars(statement)).all())
+        mark_tables_written(self.db.sync_session, self.model.__tablename__)
+        return updated
+
+    async def soft_delete_many(self, ids: list[int]) -> list[int]:
+        """Mark many records inactive; returns the ids that were active"""
+        deleted = []
+        for chunk in chunked(ids, settings.BULK_CHUNK_SIZE):
+            result = await self.db.execute(_soft_delete_many_statement(self.model),
+                                           {"ids": list(chunk)})
+            deleted.extend(result.scalars().all())
+        mark_tables_written(self.db.sync_session, self.model.__tablename__)
+        return deleted
+
     # async def count(self) -> int:
     #     """Count active records"""
     #     query = select(func.count()).select(self.model).where(
@@ -69,6 +263,5 @@ class BaseRepository(Generic[ModelType]):
         # result = await self.db.execute(query)
         # return len(result.scalars().all())
         """Cuenta registros activos."""
-        query = select(func.count(self.model.id)).where(self.model.is_active.is_(True))
-        result = await self.db.execute(query)
+        result = await self.db.execute(_page_query(self.model).count)
         return result.scalar() or 0
@@ -0,0 +1,53 @@
+from enum import Enum
+from functools import cache
+from typing import Type
+
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from app.database import Base
+from app.models.persona import Cliente, Empleado, Persona, Proveedor
+
+class LoadProfile(str, Enum):
+    """What a read loads along with the rows of its model"""
+    LIST = "list"      # rows of a list response
+    DETAIL = "detail"  # one record with everything its response shows
+    EXPORT = "export"  # the whole graph, for exports and reports
+
+#Persona como la muestra PersonaResponse: una consulta IN por coleccion,
+#sin importar cuantas personas traiga la pagina
+_PERSONA_RESPONSE = (selectinload(Persona.identificacion), selectinload(Persona.contacto))
+
+def _with_persona(relationship) -> tuple:
+    """The persona of a cliente/proveedor/empleado, joined, as PersonaResponse shows it"""
+    persona = joinedload(relationship)
+    return (persona.selectinload(Persona.identificacion),
+            persona.selectinload(Persona.contacto),
+            persona.raiseload("*"))
+
+#Loader options of every profile. raiseload("*") makes any relationship a
+#profile does not list fail loudly instead of lazy loading row by row (which
+#async sessions cannot do anyway)
+LOAD_PROFILES: dict[Type[Base], dict[LoadProfile, tuple]] = {
+    Persona: {
+        LoadProfile.LIST: (*_PERSONA_RESPONSE, raiseload("*")),
+        LoadProfile.DETAIL: (*_PERSONA_RESPONSE, raiseload("*")),
+        # Uno a uno: LEFT OUTER JOIN en la misma consulta
+        LoadProfile.EXPORT: (*_PERSONA_RESPONSE, joinedload(Persona.cliente),
+                             joinedload(Persona.proveedor), joinedload(Persona.empleado),
+                             raiseload("*")),
+    },
+    **{
+        model: dict.fromkeys(LoadProfile, (*_with_persona(model.persona), raiseload("*")))
+        for model in (Cliente, Proveedor, Empleado)
+    },
+}
+
+def load_options(model: Type[Base], profile: LoadProfile) -> tuple:
+    """Loader options of model for profile (none for models without relationships)"""
+    return LOAD_PROFILES.get(model, {}).get(LoadProfile(profile), ())
+
+@cache
+def apply_profile(statement, model: Type[Base], profile: LoadProfile):
+    """statement with the loader options of profile, built once per statement and profile"""
+    options = load_options(model, profile)
+    return statement.options(*options) if options else statement
@@ -1,74 +1,212 @@
-from sqlalchemy import select, func
+from datetime import datetime, timedelta
+
+from sqlalchemy import Float, String, and_, any_, bindparam, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.models import Identificacion
-from app.models.persona import Persona, TipoPersona
-from app.repositories.base import BaseRepository
+from app.models.persona import Contacto, Persona, TipoPersona, fold_search_text
+from app.core.pagination import CountStrategy, Page, decode_cursor, encode_cursor
+from app.repositories.base import BaseRepository, PageQuery, paginate
+from app.repositories.loading import LoadProfile, apply_profile
+
+#Statements built once, executed with bound parameters. What they load with
+#each persona comes from its LoadProfile (app.repositories.loading)
+_GET_BY_IDENTIFICACION = (
+    select(Persona)
+    .join(Identificacion)
+    .where(
+        Identificacion.numero == bindparam("numero"),
+        Identificacion.is_active.is_(True),
+        Persona.is_active.is_(True)
+    )
+)
+
+#Numeros y valores de contacto ya usados, en un solo round-trip. Sin filtro
+#is_active: los indices unicos incluyen las filas inactivas
+_EXISTING_VALUES = union_all(
+    select(literal("identificacion").label("campo"), Identificacion.numero.label("valor"))
+    .where(Identificacion.numero == any_(bindparam("numeros", type_=ARRAY(String)))),
+    select(literal("contacto"), Contacto.valor)
+    .where(Contacto.valor == any_(bindparam("valores", type_=ARRAY(String)))),
+)
+
+#Solo personas con al menos una identificacion activa. EXISTS (semi-join): una
+#fila por persona sin importar cuantas identificaciones tenga, asi LIMIT/OFFSET
+#y los totales cuentan personas
+_HAS_ACTIVE_IDENTIFICACION = Persona.identificacion.any(Identificacion.is_active.is_(True))
+
+#En las paginas se repite el keyset dentro del EXISTS: Postgres no traslada
+#persona.id > :after_id a identificacion.persona_id, y sin el una pagina
+#profunda recorre el indice de identificacion desde el principio
+_HAS_ACTIVE_IDENTIFICACION_AFTER = Persona.identificacion.any(
+    and_(Identificacion.is_active.is_(True), Identificacion.persona_id > bindparam("after_id")))
+
+#List statements: keyset on persona.id (after_id=0 plus skip for offset mode)
+_GET_BY_TIPO = (
+    select(Persona)
+    .where(_HAS_ACTIVE_IDENTIFICACION_AFTER,
+           Persona.tipo_persona == bindparam("tipo"),
+           Persona.id > bindparam("after_id"),
+           Persona.is_active.is_(True))
+    .order_by(Persona.id)
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+
+_GET_ALL = (
+    select(Persona)
+    .where(_HAS_ACTIVE_IDENTIFICACION_AFTER,
+           Persona.id > bindparam("after_id"),
+           Persona.is_active.is_(True))
+    .order_by(Persona.id)
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+
+#Lists with their totals: rows repeats the list filters so counts match the list
+_LIST_BY_TIPO = PageQuery(
+    "persona:tipo", _GET_BY_TIPO,
+    rows=(select(Persona.id)
+          .where(_HAS_ACTIVE_IDENTIFICACION,
+                 Persona.tipo_persona == bindparam("tipo"),
+                 Persona.is_active.is_(True))),
+    tables=("persona", "identificacion"),
+)
+
+_LIST_ALL = PageQuery(
+    "persona", _GET_ALL,
+    rows=(select(Persona.id)
+          .where(_HAS_ACTIVE_IDENTIFICACION,
+                 Persona.is_active.is_(True))),
+    tables=("persona", "identificacion"),
+)
+
+# SQLSTATE undefined_function: the trigram operators are missing (no pg_trgm)
+_UNDEFINED_FUNCTION = "42883"
+
+class SearchUnavailableError(RuntimeError):
+    """The database cannot run the name search (pg_trgm is not installed)"""
+
+#Busqueda por nombre: q se pliega igual que search_name. El indice GiST
+#devuelve las max_matches personas mas cercanas (q <<-> search_name, KNN) sin
+#puntuar todas las coincidencias; sobre ese conjunto se ordena y pagina con
+#keyset en (distancia, id). Primera pagina: after_distance=-1
+_SEARCH_Q = fold_search_text(bindparam("q", type_=String))
+_SEARCH_DISTANCE = _SEARCH_Q.op("<<->", return_type=Float)(Persona.search_name)
+
+_SEARCH_MATCHES = (
+    select(Persona.id, _SEARCH_DISTANCE.label("distance"))
+    .where(_SEARCH_Q.bool_op("<%")(Persona.search_name),
+           _HAS_ACTIVE_IDENTIFICACION,
+           Persona.is_active.is_(True))
+    .order_by(_SEARCH_DISTANCE)
+    .limit(bindparam("max_matches"))
+    .subquery("matches")
+)
+
+_SEARCH = (
+    select(Persona, _SEARCH_MATCHES.c.distance)
+    .join(_SEARCH_MATCHES, Persona.id == _SEARCH_MATCHES.c.id)
+    .where(or_(_SEARCH_MATCHES.c.distance > bindparam("after_distance"),
+               and_(_SEARCH_MATCHES.c.distance == bindparam("after_distance"),
+                    Persona.id > bindparam("after_id"))))
+    .order_by(_SEARCH_MATCHES.c.distance, Persona.id)
+    .limit(bindparam("limit"))
+)
+
+#Indice de GET /persona/lookup: numero -> persona de las identificaciones
+#activas de personas activas. COLLATE "C" ordena por bytes, el mismo orden
+#en el que busca el indice en memoria
+_ACTIVE_NUMEROS = (
+    select(Identificacion.numero, Identificacion.persona_id)
+    .join(Persona)
+    .where(Identificacion.is_active.is_(True), Persona.is_active.is_(True))
+    .order_by(Identificacion.numero.collate("C"))
+)
+
+#Filas tocadas desde :since por cualquiera de las dos tablas (soft delete de
+#la persona incluido), con su estado actual
+_NUMERO_IS_ACTIVE = and_(Identificacion.is_active.is_(True), Persona.is_active.is_(True))
+_NUMEROS_CHANGED_SINCE = union_all(
+    select(Identificacion.numero, Identificacion.persona_id, _NUMERO_IS_ACTIVE.label("active"))
+    .join(Persona)
+    .where(Identificacion.updated_at >= bindparam("since")),
+    select(Identificacion.numero, Identificacion.persona_id, _NUMERO_IS_ACTIVE)
+    .join(Persona)
+    .where(Persona.updated_at >= bindparam("since")),
+)
+
+#Reloj de la base en el tipo de updated_at (timestamp sin zona)
+_DB_NOW = select(func.localtimestamp())
 
 class PersonaRepository(BaseRepository[Persona]):
     """Repository for Person"""
     def __init__(self, db: AsyncSession):
         super().__init__(Persona, db)
 
-    async def get_by_identificacion(self, numero: str) -> Persona | None:
+    async def get_by_identificacion(self, numero: str,
+                                    profile: LoadProfile = LoadProfile.DETAIL) -> Persona | None:
             """Busca una persona por número de identificación."""
-            query = (
-                select(Persona)
-                .join(Identificacion)
-                .where(
-                    Identificacion.numero == numero,
-                    Identificacion.is_active.is_(True),
-                    Persona.is_active.is_(True)
-                )
-                .options(selectinload(Persona.identificacion))
-            )
-            result = await self.db.execute(query)
+            statement = apply_profile(_GET_BY_IDENTIFICACION, Persona, profile)
+            result = await self.db.execute(statement, {"numero": numero})
             return result.scalar_one_or_none()
 
-    async def get_by_id(self, id: int) -> Persona | None:
-        """Obtiene una persona por ID con sus relaciones."""
-        query = (
-            select(Persona)
-            .where(Persona.id == id, Persona.is_active.is_(True))
-            .options(
-                selectinload(Persona.identificacion)
-            )
-        )
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none()
-
-    async def get_by_tipo(self, tipo: TipoPersona, skip: int = 0,
-                          limit: int = 100) -> list[Persona] | None:
+    async def get_by_tipo(self, tipo: TipoPersona, skip: int = 0, limit: int = 100,
+                          profile: LoadProfile = LoadProfile.LIST) -> list[Persona] | None:
         """Search a person by tipo"""
-        query = (select(Persona)
-                 .join(Identificacion)
-                 .where(
-            Identificacion.is_active.is_(True),
-                        Persona.tipo_persona==tipo,
-                        Persona.is_active.is_(True))
-                 .options(selectinload(Persona.identificacion))
-                 .offset(skip).limit(limit))
-
-        result = await self.db.execute(query)
+        result = await self.db.execute(apply_profile(_GET_BY_TIPO, Persona, profile),
+                                       {"tipo": tipo, "after_id": 0, "skip": skip, "limit": limit})
         return list(result.scalars().all())
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> list[Persona]:
+    async def get_all(self, skip: int = 0, limit: int = 100,
+                      profile: LoadProfile = LoadProfile.LIST) -> list[Persona]:
         """Retrieves all active records with pagination """
-        query = (select(Persona)
-                 .join(Identificacion)
-                 .where(Identificacion.is_active.is_(True),
-                        Persona.is_active.is_(True))
-                 .options(selectinload(Persona.identificacion))
-                 .offset(skip).limit(limit))
-
-        result = await self.db.execute(query)
+        result = await self.db.execute(apply_profile(_GET_ALL, Persona, profile),
+                                       {"after_id": 0, "skip": skip, "limit": limit})
         return list(result.scalars().all())
 
-    async def count_persons(self):
-        query = (select(func.count(Persona.id))
-                 .where(Persona.is_active.is_(True)))
-        result = await self.db.execute(query)
+    async def get_page(self, limit: int = 100, after: str | None = None, skip: int = 0,
+                       tipo: TipoPersona | None = None,
+                       count: CountStrategy = CountStrategy.EXACT,
+                       profile: LoadProfile = LoadProfile.LIST) -> Page:
+        """Page of personas ordered by id, plus the cursor of the next page"""
+        if tipo:
+            return await paginate(self.db, _LIST_BY_TIPO, {"tipo": TipoPersona(tipo).value},
+                                  limit, after, skip, count, profile)
+        return await paginate(self.db, _LIST_ALL, {}, limit, after, skip, count, profile)
+
+    async def search(self, q: str, limit: int = 10, after: str | None = None,
+                     profile: LoadProfile = LoadProfile.LIST) -> Page:
+        """Personas whose names match q, best match first, plus the next cursor
+
+        Only the PERSONA_SEARCH_MAX_MATCHES best matches can be paged
+        through: a broader q has to be refined.
+        """
+        after_distance, after_id = decode_cursor(after, size=2) if after else (-1.0, 0)
+        if not isinstance(after_distance, (int, float)) or not isinstance(after_id, int):
+            raise ValueError("Invalid cursor")
+
+        params = {"q": q, "after_distance": float(after_distance), "after_id": after_id,
+                  "max_matches": settings.PERSONA_SEARCH_MAX_MATCHES, "limit": limit + 1}
+        try:
+            rows = (await self.db.execute(apply_profile(_SEARCH, Persona, profile), params)).all()
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) == _UNDEFINED_FUNCTION:
+                raise SearchUnavailableError("Name search needs the pg_trgm extension") from e
+            raise
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].distance, rows[-1][0].id)
+        return Page([row[0] for row in rows], next_cursor, None, False)
+
+    async def count_persons(self, tipo: TipoPersona | None = None) -> int:
+        """Count the personas the list would return"""
+        if tipo:
+            result = await self.db.execute(_LIST_BY_TIPO.count, {"tipo": TipoPersona(tipo).value})
+        else:
+            result = await self.db.execute(_LIST_ALL.count)
         return result.scalar() or 0
 
     async def identificacion_exists(self, numero: str) -> bool:
@@ -76,7 +214,40 @@ class PersonaRepository(BaseRepository[Persona]):
         persona = await self.get_by_identificacion(numero)
         return persona is not None
 
+    async def existing_values(self, numeros: list[str],
+                              valores: list[str]) -> tuple[set[str], set[str]]:
+        """Identification numbers and contact values already stored (one query)"""
+        result = await self.db.execute(_EXISTING_VALUES, {"numeros": numeros, "valores": valores})
+        existing = {"identificacion": set(), "contacto": set()}
+        for campo, valor in result.all():
+            existing[campo].add(valor)
+        return existing["identificacion"], existing["contacto"]
+
 class IdentificacionRepository(BaseRepository[Identificacion]):
     """Repository para identificaciones."""
     def __init__(self, db: AsyncSession):
-        super().__init__(Identificacion, db)
\ No newline at end of file
+        super().__init__(Identificacion, db)
+
+    async def now(self) -> datetime:
+        """Current time of the database, comparable with updated_at"""
+        result = await self.db.execute(_DB_NOW)
+        return result.scalar_one()
+
+    async def stream_active_numeros(self, batch_size: int = 10000):
+        """(numero, persona_id) of every active identification, in byte order"""
+        result = await self.db.stream(
+            _ACTIVE_NUMEROS.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+    async def get_numeros_changed_since(self, since: datetime,
+                                        margin: timedelta) -> list[tuple[str, int, bool]]:
+        """(numero, persona_id, active) of the identifications or personas
+        updated after since - margin"""
+        result = await self.db.execute(_NUMEROS_CHANGED_SINCE, {"since": since - margin})
+        return [tuple(row) for row in result.all()]
+
+class ContactoRepository(BaseRepository[Contacto]):
+    """Repository para contactos."""
+    def __init__(self, db: AsyncSession):
+        super().__init__(Contacto, db)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, exists, select, func, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.token import RevokedToken, RefreshToken
+from app.repositories.base import BaseRepository
+
+_IS_REVOKED = select(RevokedToken.id).where(RevokedToken.jti == bindparam("jti"))
+
+_GET_REFRESH_BY_HASH_FOR_UPDATE = (select(RefreshToken)
+                                   .where(RefreshToken.token_hash == bindparam("token_hash"))
+                                   .with_for_update())
+
+_PURGE_EXPIRED_REVOKED = delete(RevokedToken).where(RevokedToken.id.in_(
+    select(RevokedToken.id)
+    .where(RevokedToken.expires_at < func.now())
+    .limit(bindparam("limit"))
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()))
+
+# Expired refresh tokens go once their whole family has expired: until then a
+# used one still has to be recognised to revoke the family on reuse
+_LiveRefreshToken = aliased(RefreshToken)
+_PURGE_EXPIRED_REFRESH = delete(RefreshToken).where(RefreshToken.id.in_(
+    select(RefreshToken.id)
+    .where(RefreshToken.expires_at < func.now(),
+           ~exists().where(_LiveRefreshToken.family_id == RefreshToken.family_id,
+                           _LiveRefreshToken.expires_at >= func.now()))
+    .limit(bindparam("limit"))
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()))
+
+class RevokedTokenRepository(BaseRepository[RevokedToken]):
+    """Repository for revoked access tokens"""
+    def __init__(self, db: AsyncSession):
+        super().__init__(RevokedToken, db)
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        """Store a revoked jti (idempotent)"""
+        query = (insert(RevokedToken)
+                 .values(jti=jti, expires_at=expires_at)
+                 .on_conflict_do_nothing(index_elements=[RevokedToken.jti]))
+        await self.db.execute(query)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """Verify if a jti was revoked"""
+        result = await self.db.execute(_IS_REVOKED, {"jti": jti})
+        return result.first() is not None
+
+    async def get_revoked_since(self, since: datetime | None,
+                                margin: timedelta) -> list[tuple[str, datetime]]:
+        """Unexpired revocations created after since - margin, oldest first"""
+        query = (select(RevokedToken.jti, RevokedToken.created_at)
+                 .where(RevokedToken.expires_at > func.now())
+                 .order_by(RevokedToken.created_at))
+        if since is not None:
+            query = query.where(RevokedToken.created_at >= since - margin)
+        result = await self.db.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def purge_expired(self, limit: int) -> int:
+        """Delete up to limit expired revocations; rows deleted"""
+        result = await self.db.execute(_PURGE_EXPIRED_REVOKED, {"limit": limit})
+        return result.rowcount
+
+class RefreshTokenRepository(BaseRepository[RefreshToken]):
+    """Repository for refresh tokens"""
+    def __init__(self, db: AsyncSession):
+        super().__init__(RefreshToken, db)
+
+    async def get_by_hash_for_update(self, token_hash: str) -> RefreshToken | None:
+        """Gets a refresh token by digest, locking the row"""
+        result = await self.db.execute(_GET_REFRESH_BY_HASH_FOR_UPDATE,
+                                       {"token_hash": token_hash})
+        return result.scalar_one_or_none()
+
+    async def revoke_family(self, family_id: str) -> None:
+        """Revoke every token issued from the same login"""
+        query = (update(RefreshToken)
+                 .where(RefreshToken.family_id == family_id,
+                        RefreshToken.is_active.is_(True))
+                 .values(is_active=False))
+        await self.db.execute(query)
+
+    async def purge_expired(self, limit: int) -> int:
+        """Delete up to limit tokens of fully expired families; rows deleted"""
+        result = await self.db.execute(_PURGE_EXPIRED_REFRESH, {"limit": limit})
+        return result.rowcount
@@ -1,9 +1,17 @@
-from sqlalchemy import select
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
 from app.repositories.base import BaseRepository
 
+_GET_BY_EMAIL = select(User).where(User.email == bindparam("email"),
+                                   User.is_active.is_(True))
+
+#Sin filtro is_active: el indice unico de email incluye los inactivos
+_EXISTING_EMAILS = select(User.email).where(User.email == any_(bindparam("emails",
+                                                                          type_=ARRAY(String))))
+
 class UserRepository(BaseRepository[User]):
     """User specific repository"""
     def __init__(self, db: AsyncSession):
@@ -11,9 +19,7 @@ class UserRepository(BaseRepository[User]):
 
     async def get_by_email(self, email: str) -> User | None:
         """ Search for a user by mail"""
-        query = select(User).where(User.email == email,
-                                   User.is_active.is_(True))
-        result = await self.db.execute(query)
+        result = await self.db.execute(_GET_BY_EMAIL, {"email": email})
         return result.scalar_one_or_none()
 
     async def email_exists(self, email: str) -> bool:
@@ -21,3 +27,8 @@ class UserRepository(BaseRepository[User]):
         user = await self.get_by_email(email)
         return user is not None
 
+    async def existing_emails(self, emails: list[str]) -> set[str]:
+        """Emails of emails already stored (one query)"""
+        result = await self.db.execute(_EXISTING_EMAILS, {"emails": emails})
+        return set(result.scalars().all())
+
@@ -7,7 +7,7 @@ from app.schemas.user import (
     UserResponse,
     UserList,
 )
-from app.schemas.auth import LoginRequest, Token, TokenData
+from app.schemas.auth import LoginRequest, Token, TokenData, RefreshRequest
 from app.schemas.persona import (
     IdentificacionCreate,
     IdentificacionResponse,
@@ -44,6 +44,7 @@ __all__ = [
     "LoginRequest",
     "Token",
     "TokenData",
+    "RefreshRequest",
     "TokenList",
     "ClienteCreate",
     "ClienteCreateWithPersona",
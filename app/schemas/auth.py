@@ -10,6 +10,11 @@ class Token(BaseSchema):
     """Schema para respuesta de token"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+
+class RefreshRequest(BaseSchema):
+    """Schema para renovar el token de acceso"""
+    refresh_token: str
 
 class TokenData(BaseSchema):
     """Schema para datos dentro del token"""
@@ -15,4 +15,11 @@ class BaseResponseSchema(BaseSchema):
     #id: int
     created_at: datetime
     updated_at: datetime
-    is_active: bool
\ No newline at end of file
+    is_active: bool
+
+
+class BatchResult(BaseSchema):
+    """Schema de respuesta de una escritura en lote."""
+
+    ids: list[int]
+    total: int
\ No newline at end of file
@@ -106,14 +106,53 @@ class PersonaResponse(BaseResponseSchema):
     razon_social: str | None
     nombre_comercial: str | None
     identificacion: list[IdentificacionResponse] = []
-    contactos: list[ContactoResponse] = []
+    contactos: list[ContactoResponse] = Field(default=[], validation_alias="contacto")
+
+# Lotes
+
+class PersonaBatchCreate(BaseSchema):
+    """Schema for creating many persons in one request"""
+    personas: list[PersonaCreate] = Field(min_length=1)
+
+class PersonaBatchUpdateItem(PersonaUpdate):
+    """One person of a batch update"""
+    id: int
+
+class PersonaBatchUpdate(BaseSchema):
+    """Schema for updating many persons in one request"""
+    personas: list[PersonaBatchUpdateItem] = Field(min_length=1)
+
+class PersonaBatchDelete(BaseSchema):
+    """Schema for deleting many persons in one request"""
+    ids: list[int] = Field(min_length=1)
+
+class PersonaBatchResponse(BaseSchema):
+    """Schema for returning the persons created by a batch"""
+    personas: list[PersonaResponse]
+    total: int
 
 class PersonaList(BaseSchema):
     """Schema for returning a list of persons"""
     personas: list[PersonaResponse]
     total: int
+    total_exact: bool = True
     page: int
     per_page: int
+    next_cursor: str | None = None
+
+class PersonaSearchResult(BaseSchema):
+    """Schema for returning search matches, best first"""
+    personas: list[PersonaResponse]
+    next_cursor: str | None = None
+
+class IdentificacionLookupItem(BaseSchema):
+    """Schema for one identification number suggested by the typeahead"""
+    numero: str
+    persona_id: int
+
+class IdentificacionLookupResult(BaseSchema):
+    """Schema for returning typeahead suggestions, in numero order"""
+    items: list[IdentificacionLookupItem]
 
 
 # ══════════════════════════════════════════
@@ -27,6 +27,12 @@ class UserUpdate(BaseSchema):
     is_active: bool | None = None
 
 
+class UserBatchCreate(BaseSchema):
+    """Schema para crear varios usuarios en una sola peticion."""
+
+    users: list[UserCreate] = Field(min_length=1)
+
+
 # ══════════════════════════════════════════
 # Schemas de SALIDA (lo que devuelve la API)
 # ══════════════════════════════════════════
@@ -39,10 +45,19 @@ class UserResponse(BaseResponseSchema):
     role: UserRole
 
 
+class UserBatchResponse(BaseSchema):
+    """Schema para devolver los usuarios creados en lote."""
+
+    users: list[UserResponse]
+    total: int
+
+
 class UserList(BaseSchema):
     """Schema para listar usuarios con paginación."""
 
     users: list[UserResponse]
     total: int
+    total_exact: bool = True
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    next_cursor: str | None = None
\ No newline at end of file
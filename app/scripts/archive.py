@@ -0,0 +1,92 @@
+"""Move rows soft-deleted longer than the retention period to the archive tables.
+
+    python -m app.scripts.archive [--retention-days 90] [--batch-size 500] [--pause 0.5]
+
+Every batch is a short transaction of its own (locked rows are skipped and
+lock waits are bounded by ARCHIVE_LOCK_TIMEOUT_MS) followed by a pause, so
+it can run next to live traffic, e.g. nightly from cron. Expired revoked
+and refresh tokens are deleted the same way.
+"""
+import argparse
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.repositories.archive_repository import ARCHIVED_TABLES, ArchiveRepository
+from app.repositories.token_repository import RefreshTokenRepository, RevokedTokenRepository
+
+#Token tables purged (not archived) once their rows expire
+_PURGED_TOKENS = (("revoked_token", RevokedTokenRepository),
+                  ("refresh_token", RefreshTokenRepository))
+
+# SQLSTATE raised by PostgreSQL when lock_timeout expires
+_LOCK_NOT_AVAILABLE = "55P03"
+_MAX_LOCK_RETRIES = 5
+
+async def archive_table(tablename: str, retention: timedelta, batch_size: int,
+                        pause: float) -> dict[str, int]:
+    """Archive tablename batch by batch; rows moved per table"""
+    totals: dict[str, int] = {}
+    retries = 0
+    while True:
+        try:
+            async with AsyncSessionLocal() as session, session.begin():
+                await session.execute(
+                    text(f"SET LOCAL lock_timeout = {int(settings.ARCHIVE_LOCK_TIMEOUT_MS)}"))
+                moved = await ArchiveRepository(session).archive_batch(tablename, retention,
+                                                                       batch_size)
+        except DBAPIError as e:
+            # A request holds one of the rows: give way and try the batch again
+            if getattr(e.orig, "sqlstate", None) != _LOCK_NOT_AVAILABLE or retries >= _MAX_LOCK_RETRIES:
+                raise
+            retries += 1
+            await asyncio.sleep(pause)
+            continue
+
+        retries = 0
+        for table, count in moved.items():
+            totals[table] = totals.get(table, 0) + count
+        if moved.get(tablename, 0) < batch_size:
+            return totals
+        await asyncio.sleep(pause)
+
+async def purge_expired(repository_class, batch_size: int, pause: float) -> int:
+    """Delete the expired rows of a token table batch by batch; rows deleted"""
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as session, session.begin():
+            deleted = await repository_class(session).purge_expired(batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+        await asyncio.sleep(pause)
+
+async def run(args) -> None:
+    retention = timedelta(days=args.retention_days)
+    try:
+        for tablename in ARCHIVED_TABLES:
+            totals = await archive_table(tablename, retention, args.batch_size, args.pause)
+            moved = ", ".join(f"{table}={count}" for table, count in totals.items()) or "nothing"
+            print(f"{tablename}: archived {moved}")
+        for tablename, repository_class in _PURGED_TOKENS:
+            deleted = await purge_expired(repository_class, args.batch_size, args.pause)
+            print(f"{tablename}: purged {deleted} expired")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=int, default=settings.ARCHIVE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Measure this host and print the BCRYPT_ROUNDS that meets the latency target.
+
+    python -m app.scripts.calibrate_bcrypt [--target-ms 100]
+"""
+import argparse
+import time
+
+from app.config import settings
+from app.core.security import calibrate_bcrypt_rounds, configure_password_hashing, hash_password
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target-ms", type=float, default=settings.PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=settings.BCRYPT_MAX_ROUNDS)
+    args = parser.parse_args()
+
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    configure_password_hashing(rounds)
+
+    start = time.perf_counter()
+    hash_password("calibration-password")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"# one hash takes {elapsed_ms:.0f} ms on this host (target {args.target_ms:.0f} ms)")
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
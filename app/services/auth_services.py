@@ -1,10 +1,14 @@
-from datetime import timedelta
+import secrets
+from datetime import datetime, timedelta, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import verify_password, create_access_token
+from app.core.security import (verify_and_update_password_async, create_access_token,
+                               generate_refresh_token, hash_refresh_token)
+from app.core.revocation import revocation_list
 from app.config import settings
 from app.models.user import User
+from app.repositories.token_repository import RevokedTokenRepository, RefreshTokenRepository
 from app.repositories.user_repository import UserRepository
 
 class AuthService:
@@ -12,6 +16,8 @@ class AuthService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.user_repository = UserRepository(db)
+        self.revoked_token_repository = RevokedTokenRepository(db)
+        self.refresh_token_repository = RefreshTokenRepository(db)
 
     async def authenticate_user(self, email: str, password: str) -> User | None:
         """Verify credentials and return user if they are valid"""
@@ -20,9 +26,14 @@ class AuthService:
         if not user:
             return None
 
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
             return None
 
+        # Converge stored hashes to the configured bcrypt cost
+        if new_hash:
+            user = await self.user_repository.update(user, {"hashed_password": new_hash})
+
         return user
 
     def create_token_for_user(self, user: User) -> str:
@@ -34,4 +45,56 @@ class AuthService:
         }
 
         expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        return create_access_token(data=token_data, expires_delta=expires)
\ No newline at end of file
+        return create_access_token(data=token_data, expires_delta=expires)
+
+    async def revoke_token(self, payload: dict) -> None:
+        """Revoke an access token until it expires"""
+        jti = payload.get("jti")
+        if jti is None:
+            raise ValueError("Token cannot be revoked")
+
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        await self.revoked_token_repository.revoke(jti, expires_at)
+        revocation_list.add(jti)
+
+    async def issue_refresh_token(self, user: User, family_id: str | None = None) -> str:
+        """Create a refresh token for user, starting a new family by default"""
+        token = generate_refresh_token()
+        await self.refresh_token_repository.create({
+            "user_id": user.id,
+            "token_hash": hash_refresh_token(token),
+            "family_id": family_id or secrets.token_hex(16),
+            "expires_at": datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        })
+        return token
+
+    async def rotate_refresh_token(self, token: str) -> tuple[User, str] | None:
+        """Exchange a refresh token for a new one; reuse revokes its family"""
+        stored = await self.refresh_token_repository.get_by_hash_for_update(hash_refresh_token(token))
+        if stored is None or not stored.is_active:
+            return None
+
+        now = datetime.now(timezone.utc)
+        if stored.used_at is not None:
+            # Already rotated: the token leaked, kill the whole family.
+            # Commit now because the caller answers with an error.
+            await self.refresh_token_repository.revoke_family(stored.family_id)
+            await self.db.commit()
+            return None
+
+        if stored.expires_at <= now:
+            return None
+
+        user = await self.user_repository.get_by_id(stored.user_id)
+        if user is None:
+            return None
+
+        await self.refresh_token_repository.update(stored, {"used_at": now})
+        new_token = await self.issue_refresh_token(user, stored.family_id)
+        return user, new_token
+
+    async def revoke_refresh_token(self, token: str, user_id: int) -> None:
+        """Revoke the family of a refresh token of user_id (logout); others are ignored"""
+        stored = await self.refresh_token_repository.get_by_hash_for_update(hash_refresh_token(token))
+        if stored is not None and stored.user_id == user_id:
+            await self.refresh_token_repository.revoke_family(stored.family_id)
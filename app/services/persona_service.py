@@ -1,8 +1,15 @@
+from collections import defaultdict
+
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.persona import Persona, TipoPersona
-from app.repositories.persona_repository import PersonaRepository, IdentificacionRepository
-from app.schemas.persona import PersonaCreate, PersonaUpdate
+from app.config import settings
+from app.core.batch import BatchValidationError
+from app.core.pagination import CountStrategy, Page
+from app.models.persona import Contacto, Identificacion, Persona, TipoPersona
+from app.repositories.persona_repository import (PersonaRepository, IdentificacionRepository,
+                                                 ContactoRepository)
+from app.schemas.persona import PersonaBatchUpdateItem, PersonaCreate, PersonaUpdate
 
 class PersonaService:
     """Service for persona business logic"""
@@ -10,36 +17,118 @@ class PersonaService:
         self.db = db
         self.repository = PersonaRepository(db)
         self.identificacion_repository = IdentificacionRepository(db)
+        self.contacto_repository = ContactoRepository(db)
 
     async def create_persona(self, data: PersonaCreate) -> Persona:
         """Create a new persona"""
-        # Verify if the identification number exists
-        if data.identificacion:
-            for identificacion in data.identificacion:
-                if await self.repository.identificacion_exists(identificacion.numero):
-                    raise ValueError("Identification number already exists")
-        else:
-            raise ValueError("No identificacion found")
-
-        # Crear persona sin las relaciones
-        persona_data = data.model_dump(exclude={"identificacion", "contacto"})
-        persona = await self.repository.create(persona_data)
-
-        # Crear identificaciones
-        for identificacion in data.identificacion:
-             identificacion_data = identificacion.model_dump()
-             identificacion_data["persona_id"] = persona.id
-             await self.identificacion_repository.create(identificacion_data)
-        #
-        # # Crear contactos
-        # for contacto in data.contactos:
-        #     contacto_data = contacto.model_dump()
-        #     contacto_data["persona_id"] = persona.id
-        #     await self.contacto_repository.create(contacto_data)
-
-        # Refrescar para obtener las relaciones
-        return await self.repository.get_by_id(persona.id)
+        errors = await self._validate_new_personas([data])
+        if errors:
+            raise ValueError(errors[0]["detail"])
 
+        # Un solo flush: INSERT persona RETURNING + un INSERT multi-fila
+        # por tabla hija (identificaciones y contactos)
+        persona_data = data.model_dump(exclude={"identificacion", "contacto"})
+        persona_data["identificacion"] = [Identificacion(**identificacion.model_dump())
+                                          for identificacion in data.identificacion]
+        persona_data["contacto"] = [Contacto(**contacto.model_dump())
+                                    for contacto in data.contacto]
+
+        # Las relaciones ya estan cargadas: no hace falta volver a leer la persona
+        return await self.repository.create(persona_data)
+
+    async def create_personas(self, items: list[PersonaCreate]) -> list[Persona]:
+        """Create many personas: validate the whole batch, then multi-row inserts"""
+        _check_batch_size(len(items))
+        errors = await self._validate_new_personas(items)
+        if errors:
+            raise BatchValidationError(errors)
+
+        personas = await self.repository.create_many(
+            [item.model_dump(exclude={"identificacion", "contacto"}) for item in items])
+        identificaciones = await self.identificacion_repository.create_many(
+            [{**identificacion.model_dump(), "persona_id": persona.id}
+             for persona, item in zip(personas, items)
+             for identificacion in item.identificacion])
+        contactos = []
+        if any(item.contacto for item in items):
+            contactos = await self.contacto_repository.create_many(
+                [{**contacto.model_dump(), "persona_id": persona.id}
+                 for persona, item in zip(personas, items)
+                 for contacto in item.contacto])
+
+        # Relaciones armadas en memoria: la respuesta no dispara lazy loads
+        identificaciones_by_persona = defaultdict(list)
+        for identificacion in identificaciones:
+            identificaciones_by_persona[identificacion.persona_id].append(identificacion)
+        contactos_by_persona = defaultdict(list)
+        for contacto in contactos:
+            contactos_by_persona[contacto.persona_id].append(contacto)
+        for persona in personas:
+            set_committed_value(persona, "identificacion", identificaciones_by_persona[persona.id])
+            set_committed_value(persona, "contacto", contactos_by_persona[persona.id])
+        return personas
+
+    async def _validate_new_personas(self, items: list[PersonaCreate]) -> list[dict]:
+        """Errors per item: missing ids, values repeated in items or already stored"""
+        errors = []
+        numeros: dict[str, int] = {}
+        valores: dict[str, int] = {}
+        for index, item in enumerate(items):
+            if not item.identificacion:
+                errors.append({"index": index, "detail": "No identificacion found"})
+            for identificacion in item.identificacion:
+                numero = identificacion.numero
+                if numero in numeros:
+                    errors.append({"index": index, "detail": f"Identification number {numero} "
+                                                             f"repeated in item {numeros[numero]}"})
+                else:
+                    numeros[numero] = index
+            for contacto in item.contacto:
+                valor = contacto.valor
+                if valor in valores:
+                    errors.append({"index": index, "detail": f"Contact {valor} "
+                                                             f"repeated in item {valores[valor]}"})
+                else:
+                    valores[valor] = index
+
+        if numeros or valores:
+            existing_numeros, existing_valores = await self.repository.existing_values(
+                list(numeros), list(valores))
+            for numero in existing_numeros:
+                errors.append({"index": numeros[numero],
+                               "detail": f"Identification number {numero} already exists"})
+            for valor in existing_valores:
+                errors.append({"index": valores[valor],
+                               "detail": f"Contact {valor} already exists"})
+        return sorted(errors, key=lambda error: error["index"])
+
+    async def update_personas(self, items: list[PersonaBatchUpdateItem]) -> list[int]:
+        """Update many personas by id; returns the ids updated"""
+        _check_batch_size(len(items))
+        errors = []
+        first_seen: dict[int, int] = {}
+        for index, item in enumerate(items):
+            if item.id in first_seen:
+                errors.append({"index": index,
+                               "detail": f"Person {item.id} repeated in item {first_seen[item.id]}"})
+            else:
+                first_seen[item.id] = index
+
+        active = await self.repository.get_active_ids(list(first_seen))
+        for persona_id, index in first_seen.items():
+            if persona_id not in active:
+                errors.append({"index": index, "detail": f"Person with id {persona_id} not found"})
+        if errors:
+            raise BatchValidationError(sorted(errors, key=lambda error: error["index"]))
+
+        updated = await self.repository.update_many(
+            [item.model_dump(exclude_unset=True) | {"id": item.id} for item in items])
+        return [persona.id for persona in updated]
+
+    async def delete_personas(self, ids: list[int]) -> list[int]:
+        """Soft delete many personas; returns the ids that were active"""
+        _check_batch_size(len(ids))
+        return await self.repository.soft_delete_many(list(dict.fromkeys(ids)))
 
     async def get_persona(self, persona_id: int) -> Persona | None:
         """Get a persona for id"""
@@ -59,21 +148,23 @@ class PersonaService:
 
         return await self.repository.get_all(skip, limit)
 
-    async def update_persona(self, persona_id: int, data: PersonaUpdate) -> Persona | None:
-        """Update a person"""
-        persona = await self.repository.get_by_id(persona_id)
-        if not persona:
-            return None
+    async def get_person_page(self,
+                              limit: int = 100,
+                              after: str | None = None,
+                              skip: int = 0,
+                              tipo: TipoPersona | None = None,
+                              count: CountStrategy = CountStrategy.EXACT) -> Page:
+        """Get a page of persons, its total and the cursor of the next one"""
+        return await self.repository.get_page(limit=limit, after=after, skip=skip,
+                                              tipo=tipo, count=count)
 
-        # Si cambia la identificacion, verificar que no exista
-        update_data = data.model_dump(exclude_unset=True)
-        if "numero_identificacion" in update_data:
-            numero_nuevo = update_data["numero_identificacion"]
-            if numero_nuevo != persona.numero_identificacion:
-                if await self.repository.identificacion_exists(numero_nuevo):
-                    raise ValueError("Identification number already exists")
+    async def search_persons(self, q: str, limit: int = 10, after: str | None = None) -> Page:
+        """Search persons by name, best match first"""
+        return await self.repository.search(q, limit=limit, after=after)
 
-        return await self.repository.update(persona, update_data)
+    async def update_persona(self, persona_id: int, data: PersonaUpdate) -> Persona | None:
+        """Update a person (None when there is no active person with that id)"""
+        return await self.repository.update_by_id(persona_id, data.model_dump(exclude_unset=True))
 
     async def delete_person(self, persona_id: int) -> Persona | None:
         """Delete a person"""
@@ -84,7 +175,10 @@ class PersonaService:
 
         return await self.repository.delete(persona)
 
-    async def count_persons(self):
-        """Count all persons"""
-        return await self.repository.count_persons()
+    async def count_persons(self, tipo: TipoPersona | None = None) -> int:
+        """Count the persons listed (optionally of one tipo)"""
+        return await self.repository.count_persons(tipo)
 
+def _check_batch_size(size: int) -> None:
+    if size > settings.PERSONA_BATCH_MAX_ITEMS:
+        raise ValueError(f"A batch accepts at most {settings.PERSONA_BATCH_MAX_ITEMS} items")
@@ -1,6 +1,12 @@
+import asyncio
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import hash_password
+from app.config import settings
+from app.core.batch import BatchValidationError, chunked
+from app.core.pagination import CountStrategy, Page
+from app.core.principal import invalidate_principal_on_commit
+from app.core.security import hash_password_async
 from app.models.user import User
 from app.repositories.user_repository import UserRepository
 from app.schemas.user import UserCreate, UserUpdate
@@ -25,11 +31,42 @@ class UserService:
         # print(f"Password recibido: '{user_dict['password']}'")
         # print(f"Longitud: {len(user_dict['password'])}")
 
-        user_dict["hashed_password"] = hash_password(user_dict.pop("password"))
+        user_dict["hashed_password"] = await hash_password_async(user_dict.pop("password"))
 
         #Create user
         return await self.repository.create(user_dict)
 
+    async def create_users(self, users_data: list[UserCreate]) -> list[User]:
+        """Create many users: validate the whole batch, then one multi-row insert"""
+        if len(users_data) > settings.USER_BATCH_MAX_ITEMS:
+            raise ValueError(f"A batch accepts at most {settings.USER_BATCH_MAX_ITEMS} users")
+
+        errors = []
+        first_seen: dict[str, int] = {}
+        for index, user_data in enumerate(users_data):
+            if user_data.email in first_seen:
+                errors.append({"index": index, "detail": f"Email {user_data.email} repeated "
+                                                         f"in item {first_seen[user_data.email]}"})
+            else:
+                first_seen[user_data.email] = index
+        for email in await self.repository.existing_emails(list(first_seen)):
+            errors.append({"index": first_seen[email], "detail": f"Email {email} already exists"})
+        if errors:
+            raise BatchValidationError(sorted(errors, key=lambda error: error["index"]))
+
+        #Hash in rounds of the pool size so the hashing queue is never flooded
+        hashed = []
+        for chunk in chunked(users_data, settings.PASSWORD_HASH_WORKERS):
+            hashed.extend(await asyncio.gather(
+                *(hash_password_async(user_data.password) for user_data in chunk)))
+
+        rows = []
+        for user_data, hashed_password in zip(users_data, hashed):
+            user_dict = user_data.model_dump(exclude={"password"})
+            user_dict["hashed_password"] = hashed_password
+            rows.append(user_dict)
+        return await self.repository.create_many(rows)
+
     async def get_user(self, user_id: int) -> User | None:
         """Getting user by id"""
         return await self.repository.get_by_id(user_id)
@@ -42,18 +79,22 @@ class UserService:
         """Getting all users"""
         return await self.repository.get_all(skip=skip, limit=limit)
 
-    async def update_user(self, user_id: int, user_data: UserUpdate) -> User | None:
-        """Updating user"""
-        user = await self.repository.get_by_id(user_id)
-        if not user:
-            return None
+    async def get_users_page(self, limit: int = 100, after: str | None = None, skip: int = 0,
+                             count: CountStrategy = CountStrategy.EXACT) -> Page:
+        """Getting a page of users, its total and the cursor of the next one"""
+        return await self.repository.get_page(limit=limit, after=after, skip=skip, count=count)
 
+    async def update_user(self, user_id: int, user_data: UserUpdate) -> User | None:
+        """Updating user (None when there is no active user with that id)"""
         #If there is a password, encrypt it
         update_dict = user_data.model_dump(exclude_unset=True)
-        if "password" in update_dict:
-            update_dict["hashed_password"] = hash_password(update_dict.pop("password"))
+        if update_dict.get("password") is not None:
+            update_dict["hashed_password"] = await hash_password_async(update_dict.pop("password"))
 
-        return await self.repository.update(user, update_dict)
+        user = await self.repository.update_by_id(user_id, update_dict)
+        if user:
+            invalidate_principal_on_commit(self.db.sync_session, user_id)
+        return user
 
     async def delete_user(self, user_id: int) -> User | None:
         """Deleting user"""
@@ -61,7 +102,9 @@ class UserService:
         if not user:
             return None
 
-        return await self.repository.delete(user)
+        user = await self.repository.delete(user)
+        invalidate_principal_on_commit(self.db.sync_session, user_id)
+        return user
 
     async def count_users(self) -> int:
         """Count user"""
@@ -0,0 +1,85 @@
+"""GET /persona/lookup cost: the in-memory identification index vs a prefix query.
+
+Loads --rows personas into DATABASE_URL like bench_persona_list (a scratch
+database: its tables are dropped and recreated), builds the index and
+reports its load time and footprint, then the median time of --runs
+lookups per prefix against the index and against the equivalent
+numero LIKE 'prefix%' query on the database::
+
+    DATABASE_URL=postgresql+asyncpg://postgres@localhost:5432/erp_bench \\
+        python -m benchmarks.bench_identificacion_lookup --rows 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.core.lookup import IdentificacionIndex
+from app.models.persona import Identificacion, Persona
+from benchmarks.bench_persona_list import load
+
+PREFIXES = ["0", "00001", "0000123", "000012345", "0000123456", "9"]
+
+# The query the endpoint would need without the index
+_PREFIX_QUERY = (
+    select(Identificacion.numero, Identificacion.persona_id)
+    .join(Persona)
+    .where(Identificacion.numero.startswith(bindparam("prefix")),
+           Identificacion.is_active.is_(True), Persona.is_active.is_(True))
+    .order_by(Identificacion.numero.collate("C"))
+    .limit(bindparam("limit"))
+)
+
+
+async def run(args) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    if not args.skip_load:
+        await load(engine, args.rows)
+
+    index = IdentificacionIndex(refresh_seconds=3600, max_delta=10000)
+    async with AsyncSession(engine) as session:
+        tracemalloc.start()
+        await index.load(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = index.stats()
+        print(f"index: {stats['entries']} numbers, {stats['base_bytes'] / 2**20:.1f} MiB "
+              f"({stats['bytes_per_entry']} bytes/number), loaded in {stats['load_ms']:.0f} ms, "
+              f"peak {peak / 2**20:.1f} MiB while loading\n")
+
+        print(f"{'prefix':<12} {'index (us)':>11} {'query (ms)':>11} {'rows':>5}")
+        for prefix in PREFIXES:
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                matches = index.search(prefix, args.limit)
+                timings.append((time.perf_counter() - start) * 1_000_000)
+            query_timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                rows = (await session.execute(_PREFIX_QUERY, {"prefix": prefix,
+                                                              "limit": args.limit})).all()
+                query_timings.append((time.perf_counter() - start) * 1000)
+            assert [tuple(row) for row in rows] == matches
+            print(f"{prefix:<12} {statistics.median(timings):11.1f} "
+                  f"{statistics.median(query_timings):11.2f} {len(matches):5d}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--skip-load", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
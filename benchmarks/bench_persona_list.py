@@ -0,0 +1,173 @@
+"""Persona listing: JOIN + DISTINCT vs EXISTS semi-join, without and with the list indexes.
+
+Loads --rows personas (70% natural, 5% inactive; 30% with a second
+identification, 2% of identifications inactive) into DATABASE_URL, which
+must be a scratch database: its tables are dropped and recreated. Then,
+for every list query the repository issues, it reports the median time of
+--runs executions and the number of rows / distinct personas returned,
+first without the indexes added by migration 0003 and then with them::
+
+    DATABASE_URL=postgresql+asyncpg://postgres@localhost:5432/erp_bench \\
+        python -m benchmarks.bench_persona_list --rows 1000000 --plans
+
+--plans prints EXPLAIN (ANALYZE, BUFFERS) of every query and --skip-load
+reuses the data of a previous run.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.models.persona import Identificacion, Persona
+from app.repositories import persona_repository
+
+# Indexes added for the list, filter and lookup patterns (migration 0003)
+LIST_INDEXES = [index for table in ("persona", "identificacion", "contacto")
+                for index in Base.metadata.tables[table].indexes
+                if index.name in ("ix_persona_activa_tipo_id",
+                                  "ix_identificacion_persona_id_is_active",
+                                  "ix_contacto_persona_id")]
+
+LOAD = [
+    """INSERT INTO persona (tipo_persona, nombre, razon_social, is_active)
+       SELECT CASE WHEN g % 10 < 7 THEN 'natural' ELSE 'juridica' END,
+              'Persona ' || g, CASE WHEN g % 10 >= 7 THEN 'Empresa ' || g END, g % 20 <> 0
+       FROM generate_series(1, {rows}) AS g""",
+    """INSERT INTO identificacion (persona_id, tipo, numero, es_principal, is_active)
+       SELECT id, 'cedula', lpad(id::text, 10, '0'), true, id % 50 <> 0 FROM persona""",
+    """INSERT INTO identificacion (persona_id, tipo, numero, es_principal, is_active)
+       SELECT id, 'ruc', lpad(id::text, 10, '0') || '001', false, true
+       FROM persona WHERE id % 10 >= 7""",
+]
+
+
+def join_page(tipo: bool):
+    """The list statement as it was: inner join on active identifications"""
+    query = (select(Persona).join(Identificacion)
+             .where(Identificacion.is_active.is_(True),
+                    Persona.id > 0,
+                    Persona.is_active.is_(True)))
+    if tipo:
+        query = query.where(Persona.tipo_persona == "juridica")
+    return query.order_by(Persona.id)
+
+
+def join_count(tipo: bool):
+    rows = (select(Persona.id).join(Identificacion)
+            .where(Identificacion.is_active.is_(True), Persona.is_active.is_(True)))
+    if tipo:
+        rows = rows.where(Persona.tipo_persona == "juridica")
+    return select(func.count()).select_from(rows.distinct().subquery())
+
+
+def scenarios(rows: int) -> dict:
+    """name -> (join statement, exists statement)"""
+    deep = int(rows * 0.9)
+    pages = {
+        "first page": ({}, {"after_id": 0, "skip": 0, "limit": 20}),
+        "keyset page at 90%": ({"after": deep}, {"after_id": deep, "skip": 0, "limit": 20}),
+        "offset 10000": ({"skip": 10000}, {"after_id": 0, "skip": 10000, "limit": 20}),
+    }
+    result = {}
+    for tipo, exists_page in ((False, persona_repository._GET_ALL),
+                              (True, persona_repository._GET_BY_TIPO)):
+        label = "tipo=juridica " if tipo else ""
+        for name, (old, new) in pages.items():
+            join = join_page(tipo)
+            if "after" in old:
+                join = join.where(Persona.id > old["after"])
+            join = join.offset(old.get("skip", 0)).limit(20)
+            params = dict(new, tipo="juridica") if tipo else new
+            result[f"{label}{name}"] = (join, exists_page.params(**params))
+    result["count"] = (join_count(False), persona_repository._LIST_ALL.count)
+    result["tipo=juridica count"] = (join_count(True),
+                                     persona_repository._LIST_BY_TIPO.count.params(tipo="juridica"))
+    return result
+
+
+def to_sql(statement) -> str:
+    """Plain SQL to EXPLAIN (limit/offset binds are untyped, so no literal_binds)"""
+    compiled = statement.compile(dialect=postgresql.dialect())
+    literals = {name: f"'{value}'" if isinstance(value, str) else str(value)
+                for name, value in compiled.params.items()}
+    return compiled.string % literals
+
+
+async def load(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for index in LIST_INDEXES:
+            await conn.run_sync(index.drop)
+        start = time.perf_counter()
+        for statement in LOAD:
+            await conn.exec_driver_sql(statement.format(rows=rows))
+        print(f"loaded {rows} personas in {time.perf_counter() - start:.1f} s")
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+async def measure(engine, sql: str, runs: int, plans: bool) -> tuple[float, int, int, str]:
+    async with engine.connect() as conn:
+        plan = ""
+        if plans:
+            result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+            plan = "\n".join(row[0] for row in result)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fetched = (await conn.exec_driver_sql(sql)).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    ids = {row[0] for row in fetched}
+    return statistics.median(timings), len(fetched), len(ids), plan
+
+
+async def run(args) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    if not args.skip_load:
+        await load(engine, args.rows)
+
+    queries = scenarios(args.rows)
+    for with_indexes in (False, True):
+        async with engine.begin() as conn:
+            for index in LIST_INDEXES:
+                if with_indexes:
+                    await conn.run_sync(index.create, checkfirst=True)
+                else:
+                    await conn.run_sync(index.drop, checkfirst=True)
+            await conn.exec_driver_sql("ANALYZE persona, identificacion, contacto")
+
+        print(f"\n== {'with' if with_indexes else 'without'} list indexes ==")
+        print(f"{'query':<34} {'join (ms)':>10} {'rows/ids':>10}   {'exists (ms)':>11} {'rows/ids':>10}")
+        for name, (join, exists) in queries.items():
+            join_ms, join_rows, join_ids, join_plan = await measure(engine, to_sql(join),
+                                                                     args.runs, args.plans)
+            exists_ms, exists_rows, exists_ids, exists_plan = await measure(
+                engine, to_sql(exists), args.runs, args.plans)
+            print(f"{name:<34} {join_ms:10.2f} {join_rows:>5}/{join_ids:<4}   "
+                  f"{exists_ms:11.2f} {exists_rows:>5}/{exists_ids:<4}")
+            if args.plans:
+                print(f"-- join\n{join_plan}\n-- exists\n{exists_plan}\n")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--plans", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""GET /persona/search cost: the search statement over --rows personas with realistic names.
+
+Loads --rows personas into DATABASE_URL, which must be a scratch database
+with pg_trgm available (its tables are dropped and recreated): natural
+persons get first and last names with and without accents, juridical ones
+a business and a trade name. Then it reports the median time of --runs
+executions of the first page and a following (keyset) page of every query::
+
+    DATABASE_URL=postgresql+asyncpg://postgres@localhost:5432/erp_bench \\
+        python -m benchmarks.bench_persona_search --rows 1000000 --plans
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.repositories import persona_repository
+from app.repositories.persona_repository import PersonaRepository
+from benchmarks.bench_persona_list import to_sql
+
+NOMBRES = ["María", "José", "Ana", "Luis", "Carmen", "Jorge", "Lucía", "Andrés", "Sofía", "Raúl",
+           "Elena", "Martín", "Paola", "Diego", "Verónica", "Julián", "Gabriela", "Tomás"]
+APELLIDOS = ["López", "Pérez", "Núñez", "García", "Rodríguez", "Zambrano", "Mendoza", "Castillo",
+             "Vásquez", "Andrade", "Ortiz", "Peña", "Salazar", "Jiménez", "Cevallos", "Muñoz"]
+GIROS = ["Ferretería", "Panadería", "Farmacia", "Importadora", "Distribuidora", "Constructora",
+         "Librería", "Comercial", "Transportes", "Inversiones"]
+LUGARES = ["Andina", "del Pacífico", "Quito", "Guayas", "Austral", "Amazónica", "del Valle",
+           "Imbabura", "Los Ríos", "El Oro", "Galápagos", "Centro"]
+
+QUERIES = ["maria lopez", "nunez", "ferreteria andina", "farmacia del pacifico", "jose",
+           "mria lopz", "ferreteria xyz", "xyzw"]
+
+
+def _array(values: list[str]) -> str:
+    return "ARRAY[" + ", ".join(f"'{value}'" for value in values) + "]"
+
+
+LOAD = [
+    f"""INSERT INTO persona (tipo_persona, nombre, apellido, razon_social, nombre_comercial, is_active)
+        SELECT CASE WHEN g % 10 < 7 THEN 'natural' ELSE 'juridica' END,
+               CASE WHEN g % 10 < 7 THEN ({_array(NOMBRES)})[1 + g % {len(NOMBRES)}] END,
+               CASE WHEN g % 10 < 7 THEN ({_array(APELLIDOS)})[1 + (g / 7) % {len(APELLIDOS)}] || ' '
+                    || ({_array(APELLIDOS)})[1 + (g / 131) % {len(APELLIDOS)}] END,
+               CASE WHEN g % 10 >= 7 THEN ({_array(GIROS)})[1 + (g / 10) % {len(GIROS)}] || ' '
+                    || ({_array(LUGARES)})[1 + (g / 11) % {len(LUGARES)}] || ' ' || g END,
+               CASE WHEN g % 10 >= 7 THEN ({_array(LUGARES)})[1 + (g / 13) % {len(LUGARES)}] END,
+               g % 20 <> 0
+        FROM generate_series(1, {{rows}}) AS g""",
+    """INSERT INTO identificacion (persona_id, tipo, numero, es_principal, is_active)
+       SELECT id, 'cedula', lpad(id::text, 10, '0'), true, true FROM persona""",
+]
+
+
+async def load(engine, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        if not await conn.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")):
+            raise SystemExit("pg_trgm is not available on this server")
+        start = time.perf_counter()
+        for statement in LOAD:
+            await conn.exec_driver_sql(statement.format(rows=rows))
+        print(f"loaded {rows} personas in {time.perf_counter() - start:.1f} s")
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+async def run(args) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    if not args.skip_load:
+        await load(engine, args.rows)
+
+    print(f"{'q':<24} {'first page (ms)':>16} {'next page (ms)':>15} {'rows':>5}")
+    async with AsyncSession(engine) as session:
+        repository = PersonaRepository(session)
+        for q in QUERIES:
+            timings = {"first": [], "next": []}
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                page = await repository.search(q, limit=args.limit)
+                timings["first"].append((time.perf_counter() - start) * 1000)
+                if page.next_cursor:
+                    start = time.perf_counter()
+                    await repository.search(q, limit=args.limit, after=page.next_cursor)
+                    timings["next"].append((time.perf_counter() - start) * 1000)
+                session.expunge_all()
+            next_ms = statistics.median(timings["next"]) if timings["next"] else 0.0
+            print(f"{q:<24} {statistics.median(timings['first']):16.2f} {next_ms:15.2f} "
+                  f"{len(page.items):5d}")
+
+            if args.plans:
+                statement = persona_repository._SEARCH.params(q=q, after_distance=-1.0, after_id=0,
+                                                              max_matches=settings.PERSONA_SEARCH_MAX_MATCHES,
+                                                              limit=args.limit + 1)
+                plan = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {to_sql(statement)}"))
+                print("\n".join(row[0] for row in plan) + "\n")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--plans", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Load test: CPU spent renewing access tokens with /auth/login vs /auth/refresh.
+
+Runs the real application in-process against DATABASE_URL (schema must
+exist) and renews tokens for --users users --renewals times each::
+
+    python -m benchmarks.bench_refresh_vs_login --users 20 --renewals 10
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("LOGIN_RATE_LIMIT_PER_EMAIL", "1000")
+os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "1000")
+
+import httpx
+
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.schemas.user import UserCreate
+from app.services.user_service import UserService
+
+PASSWORD = "bench-password"
+
+
+async def ensure_users(count: int) -> list[str]:
+    emails = [f"bench-refresh-{i}@example.com" for i in range(count)]
+    async with AsyncSessionLocal() as db:
+        service = UserService(db)
+        for email in emails:
+            if not await service.get_user_by_email(email):
+                await service.create_user(UserCreate(email=email, password=PASSWORD,
+                                                     full_name="Bench User"))
+        await db.commit()
+    return emails
+
+
+async def measure(client: httpx.AsyncClient, emails: list[str], renewals: int, mode: str) -> dict:
+    tokens = {}
+    if mode == "refresh":
+        for email in emails:
+            response = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+            tokens[email] = response.json()["refresh_token"]
+
+    async def renew(email: str):
+        for _ in range(renewals):
+            if mode == "login":
+                response = await client.post("/api/v1/auth/login",
+                                             json={"email": email, "password": PASSWORD})
+            else:
+                response = await client.post("/api/v1/auth/refresh",
+                                             json={"refresh_token": tokens[email]})
+                tokens[email] = response.json()["refresh_token"]
+            response.raise_for_status()
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(renew(email) for email in emails))
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    total = len(emails) * renewals
+    return {"mode": mode, "renewals": total, "cpu_ms_per_renewal": cpu / total * 1000,
+            "renewals_per_s": total / wall, "cpu_s": cpu}
+
+
+async def run(users: int, renewals: int) -> None:
+    async with app.router.lifespan_context(app):
+        emails = await ensure_users(users)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = [await measure(client, emails, renewals, mode) for mode in ("login", "refresh")]
+
+    for result in results:
+        print("{mode:>7}: {renewals} renewals, {cpu_s:.2f}s CPU, {cpu_ms_per_renewal:.2f} ms CPU/renewal, "
+              "{renewals_per_s:.1f} renewals/s".format(**result))
+    print(f"CPU reduction: {results[0]['cpu_s'] / results[1]['cpu_s']:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--renewals", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.renewals))
+
+
+if __name__ == "__main__":
+    main()
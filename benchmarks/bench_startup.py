@@ -0,0 +1,82 @@
+"""Worker startup cost of the schema step: create_all vs the Alembic version check.
+
+Starts --workers processes at once (like a cold start or rolling restart)
+against DATABASE_URL, which must already be migrated, and reports the
+round-trips and time each one spends in the startup schema step::
+
+    python -m benchmarks.bench_startup --workers 4 --rounds 3
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+
+async def schema_step(mode: str) -> tuple[float, int]:
+    from sqlalchemy import event
+
+    from app.core.schema import verify_schema_version
+    from app.database import Base, engine
+    import app.models  # noqa: F401  (register every table on Base.metadata)
+
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    if mode == "verify":
+        await verify_schema_version(engine)
+    else:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return elapsed * 1000, statements
+
+
+def run_workers(mode: str, workers: int) -> tuple[list[float], int, float]:
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    timings, statements = [], 0
+    for process in processes:
+        out, _ = process.communicate()
+        if process.returncode != 0:
+            raise SystemExit(f"worker failed ({mode})")
+        elapsed, statements = out.split()
+        timings.append(float(elapsed))
+    return timings, int(statements), (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--child", choices=["create_all", "verify"])
+    args = parser.parse_args()
+
+    if args.child:
+        print(*asyncio.run(schema_step(args.child)))
+        return
+
+    for mode in ("create_all", "verify"):
+        steps, walls = [], []
+        for _ in range(args.rounds):
+            timings, statements, wall = run_workers(mode, args.workers)
+            steps.extend(timings)
+            walls.append(wall)
+        print(f"{mode:<10} workers={args.workers}  round-trips {statements:3d}  schema step median "
+              f"{statistics.median(steps):7.1f} ms  max {max(steps):7.1f} ms  "
+              f"all workers ready (median) {statistics.median(walls):7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
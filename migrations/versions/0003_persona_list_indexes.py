@@ -0,0 +1,38 @@
+"""persona list indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:39:41.649327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: building them does not block writes on populated tables
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_contacto_persona_id'), 'contacto', ['persona_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_identificacion_persona_id_is_active', 'identificacion',
+                        ['persona_id', 'is_active'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_persona_activa_tipo_id', 'persona', ['tipo_persona', 'id'],
+                        unique=False, postgresql_where=sa.text('is_active IS true'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_persona_activa_tipo_id', table_name='persona')
+    op.drop_index('ix_identificacion_persona_id_is_active', table_name='identificacion')
+    op.drop_index(op.f('ix_contacto_persona_id'), table_name='contacto')
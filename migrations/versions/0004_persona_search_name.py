@@ -0,0 +1,44 @@
+"""persona search_name
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:52:06.318114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match Persona.search_name in app/models/persona.py
+SEARCH_NAME = (
+    "lower(translate(coalesce(nombre, '') || ' ' || coalesce(apellido, '') || ' ' || "
+    "coalesce(razon_social, '') || ' ' || coalesce(nombre_comercial, ''), "
+    "'áàäâãéèëêíìïîóòöôõúùüûñçÁÀÄÂÃÉÈËÊÍÌÏÎÓÒÖÔÕÚÙÜÛÑÇ', "
+    "'aaaaaeeeeiiiiooooouuuuncAAAAAEEEEIIIIOOOOOUUUUNC'))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Adding a stored generated column rewrites persona (ACCESS EXCLUSIVE lock)
+    op.add_column('persona', sa.Column('search_name', sa.Text(),
+                                       sa.Computed(SEARCH_NAME, persisted=True), nullable=False))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_persona_search_name_trgm', 'persona', ['search_name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'search_name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_persona_search_name_trgm', table_name='persona')
+    op.drop_column('persona', 'search_name')
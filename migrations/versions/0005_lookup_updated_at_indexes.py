@@ -0,0 +1,33 @@
+"""identificacion lookup refresh indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:05:12.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: building them does not block writes on populated tables
+    with op.get_context().autocommit_block():
+        op.create_index('ix_identificacion_updated_at', 'identificacion', ['updated_at'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_persona_updated_at', 'persona', ['updated_at'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_persona_updated_at', table_name='persona')
+    op.drop_index('ix_identificacion_updated_at', table_name='identificacion')
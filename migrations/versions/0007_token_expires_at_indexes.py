@@ -0,0 +1,35 @@
+"""token expires_at indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:12:44.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose expired rows app.scripts.archive purges by expires_at
+TOKEN_TABLES = ('revoked_token', 'refresh_token')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: building them does not block logins on populated tables
+    with op.get_context().autocommit_block():
+        for table in TOKEN_TABLES:
+            op.create_index(f'ix_{table}_expires_at', table, ['expires_at'],
+                            unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TOKEN_TABLES):
+        op.drop_index(f'ix_{table}_expires_at', table_name=table)
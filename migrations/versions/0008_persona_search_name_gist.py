@@ -0,0 +1,41 @@
+"""persona search_name gist index
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 21:05:17.226914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GiST answers the search by distance (KNN); the GIN index could only
+    # filter, so every match had to be scored and sorted. The new index is
+    # built before the old one goes, so search never runs without one
+    with op.get_context().autocommit_block():
+        op.create_index('ix_persona_search_name_gist', 'persona', ['search_name'], unique=False,
+                        postgresql_using='gist',
+                        postgresql_ops={'search_name': 'gist_trgm_ops(siglen=256)'},
+                        postgresql_concurrently=True)
+        op.drop_index('ix_persona_search_name_trgm', table_name='persona',
+                      postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_persona_search_name_trgm', 'persona', ['search_name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'search_name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+        op.drop_index('ix_persona_search_name_gist', table_name='persona',
+                      postgresql_concurrently=True)
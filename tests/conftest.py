@@ -11,4 +11,50 @@ async def client():
     """Cliente HTTP para tests."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        yield ac
\ No newline at end of file
+        yield ac
+
+@pytest.fixture
+async def db_session():
+    """Sesion sobre la BD de pruebas; todo se revierte al terminar."""
+    from sqlalchemy.exc import DBAPIError
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    import app.models  # noqa: F401
+    from app.config import settings
+    from app.database import Base
+
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        conn = await engine.connect()
+    except (OSError, DBAPIError) as e:
+        await engine.dispose()
+        pytest.skip(f"Database not available: {e}")
+
+    transaction = await conn.begin()
+    await conn.run_sync(Base.metadata.create_all)
+    session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint",
+                           expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await conn.close()
+        await engine.dispose()
+
+@pytest.fixture
+def sql_statements(db_session):
+    """Sentencias SQL emitidas por db_session durante el test (sin los SAVEPOINT del fixture)."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT")):
+            statements.append(statement)
+
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(sync_engine, "before_cursor_execute", record)
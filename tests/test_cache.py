@@ -0,0 +1,90 @@
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+from app.core.principal import Principal, principal_cache
+from app.models.user import UserRole
+from app.repositories.user_repository import UserRepository
+from app.schemas.user import UserUpdate
+from app.services.user_service import UserService
+
+
+def test_cache_hit_and_miss_counters():
+    """Verificar contadores de aciertos y fallos"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(1, "a")
+
+    assert cache.get(1) == "a"
+    assert cache.get(2) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Verificar que se expulsa la entrada menos usada"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.evictions == 1
+
+
+def test_cache_entries_expire(monkeypatch):
+    """Verificar que las entradas expiran segun el TTL"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("k", "v")
+
+    now[0] += 4
+    assert cache.get("k") == "v"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_cache_invalidate():
+    """Verificar la invalidacion explicita"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(1, "a")
+    cache.invalidate(1)
+    cache.invalidate(2)
+
+    assert cache.get(1) is None
+
+
+def test_principal_uses_slots():
+    """El principal no debe tener __dict__"""
+    principal = Principal(1, "admin@test.com", UserRole.ADMIN)
+
+    assert not hasattr(principal, "__dict__")
+    assert principal.role == "admin"
+
+
+@pytest.mark.anyio
+async def test_principal_is_invalidated_after_commit(db_session):
+    """El principal cacheado se descarta al confirmar el cambio, no antes"""
+    user = await UserRepository(db_session).create({
+        "email": "principal@test.com", "hashed_password": "x", "full_name": "Principal",
+    })
+    user_id = user.id
+    await db_session.commit()
+    principal_cache.set(user_id, Principal.from_user(user))
+    service = UserService(db_session)
+
+    await service.update_user(user_id, UserUpdate(full_name="Rolled back"))
+    await db_session.rollback()
+    await db_session.commit()
+    assert principal_cache.get(user_id) is not None
+
+    await service.update_user(user_id, UserUpdate(full_name="Changed"))
+    assert principal_cache.get(user_id) is not None
+
+    await db_session.commit()
+    assert principal_cache.get(user_id) is None
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.requests import Request
+
+from app import database
+from app.config import settings
+from app.database import (READ_YOUR_WRITES_HEADER, ReadOnlySession, ReplicaMonitor,
+                          _read_session_factory, get_read_db)
+from app.models.user import User
+
+
+def test_read_only_session_refuses_to_flush():
+    """La sesion de solo lectura no escribe cambios pendientes"""
+    session = ReadOnlySession()
+    session.add(User(email="ro@test.com", hashed_password="x", full_name="Read Only"))
+
+    with pytest.raises(RuntimeError):
+        session.flush()
+
+
+@pytest.fixture
+async def replica_engine():
+    """La BD de pruebas hace de replica (no esta en recovery: lag 0)"""
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect():
+            pass
+    except OSError as e:
+        await engine.dispose()
+        pytest.skip(f"Database not available: {e}")
+    yield engine
+    await engine.dispose()
+
+
+async def _read_target(monkeypatch, engine, max_lag_seconds: float, headers=()) -> str:
+    monitor = ReplicaMonitor(engine, max_lag_seconds=max_lag_seconds, check_seconds=60,
+                             check_timeout_seconds=5)
+    replica_sessions = _read_session_factory(engine)
+    monkeypatch.setattr(database, "replica_monitor", monitor)
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", replica_sessions)
+
+    request = Request({"type": "http", "headers": [(k.lower().encode(), v.encode())
+                                                   for k, v in headers]})
+    async for session in get_read_db(request):
+        assert monitor.replica_reads + monitor.primary_reads == 1
+        return "replica" if session.bind.sync_engine.pool is engine.sync_engine.pool else "primary"
+
+
+@pytest.mark.anyio
+async def test_reads_use_the_replica_within_the_lag_budget(monkeypatch, replica_engine):
+    """Replica al dia: las lecturas van a la replica"""
+    assert await _read_target(monkeypatch, replica_engine, max_lag_seconds=5) == "replica"
+    assert database.replica_monitor.lag_seconds == 0
+
+
+@pytest.mark.anyio
+async def test_reads_fall_back_to_the_primary_when_the_replica_lags(monkeypatch, replica_engine):
+    """Lag por encima del presupuesto: las lecturas van al primario"""
+    assert await _read_target(monkeypatch, replica_engine, max_lag_seconds=-1) == "primary"
+    assert database.replica_monitor.primary_reads == 1
+
+
+@pytest.mark.anyio
+async def test_read_your_writes_header_reads_from_the_primary(monkeypatch, replica_engine):
+    """Con la cabecera se lee del primario sin medir el lag"""
+    target = await _read_target(monkeypatch, replica_engine, max_lag_seconds=5,
+                                headers=[(READ_YOUR_WRITES_HEADER, "1")])
+
+    assert target == "primary"
+    assert database.replica_monitor.lag_seconds is None
+
+
+@pytest.mark.anyio
+async def test_replica_check_is_bounded_and_logged(monkeypatch, caplog):
+    """Una replica que no responde cuesta como mucho el timeout del chequeo"""
+    monitor = ReplicaMonitor(object(), max_lag_seconds=5, check_seconds=60,
+                             check_timeout_seconds=0.05)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(monitor, "_measure_lag", hang)
+    start = time.monotonic()
+
+    assert not await monitor.is_usable()
+    assert time.monotonic() - start < 1
+    assert monitor.failed_checks == 1
+    assert "Replica lag check failed" in caplog.text
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi import Depends
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deadline import DeadlineMiddleware, deadline_metrics, remaining_seconds
+from app.database import engine, get_db
+from app.main import app
+
+
+async def call(app, headers=(), disconnect_after: float | None = None):
+    """Ejecuta una peticion ASGI y devuelve los mensajes enviados"""
+    sent = []
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": list(headers)}
+    await app(scope, receive, send)
+    return sent
+
+
+def endpoint(delay: float, seen: list):
+    async def app(scope, receive, send):
+        seen.append(remaining_seconds())
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            seen.append("cancelled")
+            raise
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+@pytest.mark.anyio
+async def test_request_within_budget():
+    """La peticion termina y ve el presupuesto restante"""
+    seen = []
+    sent = await call(DeadlineMiddleware(endpoint(0, seen), timeout_seconds=5))
+
+    assert sent[0]["status"] == 200
+    assert 0 < seen[0] <= 5
+
+
+@pytest.mark.anyio
+async def test_request_over_budget_returns_504():
+    """Al agotar el presupuesto se cancela el endpoint y responde 504"""
+    seen = []
+    before = deadline_metrics.deadline_exceeded
+    app = DeadlineMiddleware(endpoint(5, seen), timeout_seconds=5)
+    sent = await call(app, headers=[(b"x-request-timeout", b"0.05")])
+
+    assert sent[0]["status"] == 504
+    assert seen[-1] == "cancelled"
+    assert deadline_metrics.deadline_exceeded == before + 1
+
+
+@pytest.mark.anyio
+async def test_client_disconnect_cancels_request():
+    """Si el cliente se desconecta se cancela el trabajo pendiente"""
+    seen = []
+    before = deadline_metrics.client_disconnects
+    sent = await call(DeadlineMiddleware(endpoint(5, seen), timeout_seconds=5),
+                      disconnect_after=0.05)
+
+    assert sent == []
+    assert seen[-1] == "cancelled"
+    assert deadline_metrics.client_disconnects == before + 1
+
+
+@pytest.fixture
+async def query_routes(db_session):
+    """Rutas temporales: una supera el statement_timeout y otra falla en la BD"""
+    async def slow_query(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SET LOCAL statement_timeout = 1"))
+        await db.execute(text("SELECT pg_sleep(1)"))
+
+    async def failing_query(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1 / 0"))
+
+    app.add_api_route("/test/slow-query", slow_query)
+    app.add_api_route("/test/failing-query", failing_query)
+    try:
+        yield
+    finally:
+        del app.router.routes[-2:]
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_statement_timeout_returns_504(client, query_routes):
+    """La consulta cancelada por statement_timeout responde 504"""
+    before = deadline_metrics.statement_timeouts
+    response = await client.get("/test/slow-query")
+
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+    assert deadline_metrics.statement_timeouts == before + 1
+
+
+@pytest.mark.anyio
+async def test_other_database_errors_are_not_timeouts(client, query_routes):
+    """Los demas errores de la BD no se reportan como timeout"""
+    before = deadline_metrics.statement_timeouts
+    with pytest.raises(DBAPIError):
+        await client.get("/test/failing-query")
+
+    assert deadline_metrics.statement_timeouts == before
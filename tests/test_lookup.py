@@ -0,0 +1,132 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.lookup import IdentificacionIndex, PackedPrefixIndexBuilder, _merge
+from app.models.persona import TipoIdentificacion, TipoPersona
+from app.repositories.persona_repository import PersonaRepository
+from app.schemas.persona import IdentificacionCreate, PersonaCreate
+from app.services.persona_service import PersonaService
+
+
+def _packed(pairs):
+    builder = PackedPrefixIndexBuilder()
+    for key, value in pairs:
+        builder.add(key.encode(), value)
+    return builder.build()
+
+
+def test_packed_index_scans_prefix_in_order():
+    """Solo las claves con el prefijo, en orden de bytes"""
+    index = _packed([("0102", 1), ("0102001", 2), ("0103", 3), ("0201", 4)])
+
+    assert list(index.scan(b"010")) == [(b"0102", 1), (b"0102001", 2), (b"0103", 3)]
+    assert list(index.scan(b"0102")) == [(b"0102", 1), (b"0102001", 2)]
+    assert list(index.scan(b"09")) == []
+    assert index.get(b"0103") == 3
+    assert index.get(b"010") is None
+
+
+def test_index_applies_delta_over_base():
+    """Altas, bajas y cambios pendientes se ven antes de compactar"""
+    index = IdentificacionIndex(refresh_seconds=5, max_delta=100, reload_seconds=3600)
+    index._base = _packed([("0101", 1), ("0102", 2), ("0103", 3)])
+
+    index._apply(b"0102", None)         # persona o identificacion desactivada
+    index._apply(b"01015", 5)           # nueva
+    index._apply(b"0103", 7)            # otra persona
+    index._apply(b"0101", 1)            # releida sin cambios: no ocupa el delta
+
+    assert index.search("01", limit=10) == [("0101", 1), ("01015", 5), ("0103", 7)]
+    assert index.search("01", limit=2) == [("0101", 1), ("01015", 5)]
+    assert len(index._delta) == 3
+    assert len(index) == 3
+
+
+def test_merge_folds_delta_into_new_base():
+    """La compactacion produce la misma vista que base + delta"""
+    base = _packed([("0101", 1), ("0102", 2), ("0103", 3)])
+    merged = _merge(base, [(b"01015", 5), (b"0102", None), (b"0103", 7)])
+
+    assert list(merged.items()) == [(b"0101", 1), (b"01015", 5), (b"0103", 7)]
+
+
+def test_commit_of_persona_tables_marks_index_stale():
+    """Las escrituras de este worker fuerzan el refresco en la siguiente consulta"""
+    index = IdentificacionIndex(refresh_seconds=5, max_delta=100, reload_seconds=3600)
+    index.tables_committed({"users"})
+    assert not index._stale
+
+    index.tables_committed({"identificacion"})
+    assert index._stale
+
+
+@pytest.mark.anyio
+async def test_index_loads_refreshes_and_looks_up_from_the_database(db_session):
+    """Carga en frio, baja de una persona y refresco contra la BD"""
+    personas = await PersonaService(db_session).create_personas([
+        PersonaCreate(tipo_persona=TipoPersona.NATURAL, nombre=f"P{i}",
+                      identificacion=[IdentificacionCreate(tipo=TipoIdentificacion.CEDULA,
+                                                           numero=f"09800000{i:02d}")])
+        for i in range(3)])
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    index = IdentificacionIndex(refresh_seconds=3600, max_delta=100, reload_seconds=3600,
+                                session_factory=session_factory)
+    assert await index.lookup("098000000", limit=10) == [
+        (f"09800000{i:02d}", p.id) for i, p in enumerate(personas)]
+
+    await PersonaRepository(db_session).soft_delete_many([personas[1].id])
+    index.tables_committed({"persona"})
+
+    assert await index.lookup("098000000", limit=10) == [
+        ("0980000000", personas[0].id), ("0980000002", personas[2].id)]
+    assert index.refreshes == 1
+
+
+def _stale_index(load):
+    index = IdentificacionIndex(refresh_seconds=3600, max_delta=100, reload_seconds=600)
+    index._refreshed_at = index._loaded_at = time.monotonic() - 601
+    index.load = load
+    return index
+
+
+@pytest.mark.anyio
+async def test_concurrent_lookups_start_a_single_reload():
+    """Vencida la recarga, las consultas concurrentes lanzan una sola"""
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        index._loaded_at = time.monotonic()
+
+    index = _stale_index(load)
+    await asyncio.gather(*(index.lookup("09", limit=5) for _ in range(20)))
+    await index._reload_task
+    await asyncio.gather(*(index.lookup("09", limit=5) for _ in range(20)))
+
+    assert len(loads) == 1
+    assert index.reloads == 1
+
+
+@pytest.mark.anyio
+async def test_failed_reload_is_logged_and_not_retried_on_every_lookup(caplog):
+    """Si la recarga falla se sigue sirviendo el indice y se reintenta mas tarde"""
+    async def load():
+        raise OSError("database is down")
+
+    index = _stale_index(load)
+    await index.lookup("09", limit=5)
+    await index._reload_task
+    task = index._reload_task
+    await index.lookup("09", limit=5)
+
+    assert index._reload_task is task
+    assert index.reload_failures == 1
+    assert "reload failed" in caplog.text
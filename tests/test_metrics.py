@@ -0,0 +1,13 @@
+from app.core.metrics import Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    """Los buckets acumulan las observaciones menores o iguales"""
+    histogram = Histogram(buckets=(1, 10, 100))
+    for value in (0.5, 1, 5, 50, 500):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_1": 2, "le_10": 3, "le_100": 4, "le_inf": 5}
+    assert snapshot["count"] == 5
+    assert snapshot["max_ms"] == 500
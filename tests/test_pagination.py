@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.pagination import CountCache, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """El cursor conserva la clave de orden"""
+    assert decode_cursor(encode_cursor(42)) == [42]
+    assert decode_cursor(encode_cursor(0.75, 42), size=2) == [0.75, 42]
+
+
+@pytest.mark.parametrize("cursor", ["no-es-base64!", encode_cursor(1, 2), "bnVsbA"])
+def test_invalid_cursor(cursor):
+    """Un cursor manipulado se rechaza con ValueError"""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_count_cache_invalidated_by_table():
+    """Escribir en una tabla descarta los totales que dependen de ella"""
+    cache = CountCache(maxsize=10, ttl=60)
+    cache.set(("persona",), 10, ("persona", "identificacion"))
+    cache.set(("users",), 3, ("users",))
+
+    cache.invalidate_tables({"identificacion"})
+
+    assert cache.get(("persona",)) is None
+    assert cache.get(("users",)) == 3
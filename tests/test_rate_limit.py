@@ -0,0 +1,108 @@
+from starlette.requests import Request
+
+from app.core import rate_limit
+from app.core.rate_limit import SlidingWindowLimiter, check_login_attempt, get_client_ip
+
+
+def test_limiter_allows_up_to_limit():
+    """Se permiten exactamente `limit` intentos por ventana"""
+    limiter = SlidingWindowLimiter(limit=3, window_seconds=60, slots=1024)
+    now = limiter._epoch
+
+    assert [limiter.hit("a@a.com", now) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit("a@a.com", now) > 0
+    assert limiter.hit("b@a.com", now) == 0
+
+
+def test_limiter_retry_after_is_honoured():
+    """Despues de esperar Retry-After el intento se permite"""
+    limiter = SlidingWindowLimiter(limit=3, window_seconds=60, slots=1024)
+    now = limiter._epoch + 30
+    for _ in range(3):
+        limiter.hit("key", now)
+
+    wait = limiter.hit("key", now)
+    assert wait > 0
+    assert limiter.hit("key", now + wait - 1) > 0
+    assert limiter.hit("key", now + wait + 0.01) == 0
+
+
+def test_limiter_previous_window_is_weighted():
+    """La ventana anterior cuenta de forma proporcional"""
+    limiter = SlidingWindowLimiter(limit=4, window_seconds=60, slots=1024)
+    start = limiter._epoch
+    for _ in range(4):
+        limiter.hit("key", start + 59)
+
+    # A la mitad de la siguiente ventana quedan 2 intentos "heredados"
+    assert limiter.hit("key", start + 90) == 0
+    assert limiter.hit("key", start + 90) == 0
+    assert limiter.hit("key", start + 90) > 0
+
+
+def test_limiter_memory_is_fixed():
+    """El estado no crece con el numero de claves"""
+    limiter = SlidingWindowLimiter(limit=5, window_seconds=60, slots=4096)
+    now = limiter._epoch
+    for i in range(20000):
+        limiter.hit(f"user{i}@a.com", now)
+
+    assert limiter.stats()["table_bytes"] == 4096 * 8
+
+
+def test_limiter_stats_count_live_keys():
+    """Solo se cuentan las claves con intentos recientes"""
+    limiter = SlidingWindowLimiter(limit=5, window_seconds=60, slots=1024)
+    limiter.hit("a")
+    limiter.hit("b")
+
+    assert limiter.stats()["live_keys"] == 2
+
+
+def test_login_attempt_refused_by_email_does_not_use_ip_budget(monkeypatch):
+    """Un intento rechazado por un limite no consume el otro"""
+    monkeypatch.setattr(rate_limit, "login_ip_limiter",
+                        SlidingWindowLimiter(limit=3, window_seconds=60, slots=1024))
+    monkeypatch.setattr(rate_limit, "login_email_limiter",
+                        SlidingWindowLimiter(limit=1, window_seconds=60, slots=1024))
+
+    assert check_login_attempt("a@a.com", "10.0.0.1") == 0
+    assert all(check_login_attempt("A@a.com ", "10.0.0.1") > 0 for _ in range(5))
+    assert check_login_attempt("b@a.com", "10.0.0.1") == 0
+    assert check_login_attempt("c@a.com", "10.0.0.1") == 0
+    assert check_login_attempt("d@a.com", "10.0.0.1") > 0
+
+
+def _request(peer: str, forwarded_for: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_client_ip_trusts_forwarded_for_only_from_proxies(monkeypatch):
+    """X-Forwarded-For solo cuenta si el par es un proxy de confianza"""
+    monkeypatch.setattr(rate_limit, "_trusted_proxies",
+                        [rate_limit.ipaddress.ip_network("10.0.0.0/8")])
+
+    assert get_client_ip(_request("203.0.113.5", "1.2.3.4")) == "203.0.113.5"
+    assert get_client_ip(_request("10.0.0.2", "1.2.3.4, 198.51.100.7, 10.0.0.9")) == "198.51.100.7"
+    assert get_client_ip(_request("10.0.0.2")) == "10.0.0.2"
+
+
+def test_full_probe_sequence_fails_closed():
+    """Con los slots sondeados llenos se rechaza la clave nueva sin pisar contadores vivos"""
+    limiter = SlidingWindowLimiter(limit=2, window_seconds=60, slots=SlidingWindowLimiter.PROBES)
+    now = limiter._epoch
+    assert limiter.hit("victim@a.com", now) == 0
+    assert limiter.hit("victim@a.com", now) == 0
+    assert limiter.hit("victim@a.com", now) > 0
+
+    placed = sum(limiter.hit(f"spray{i}@a.com", now) == 0 for i in range(20))
+    table = bytes(limiter._table)
+
+    assert placed == SlidingWindowLimiter.PROBES - 1
+    assert limiter.check("other@a.com", now) > 0
+    assert bytes(limiter._table) == table
+    assert limiter.hit("victim@a.com", now) > 0
+    assert limiter.stats()["saturated"] > 0
+    # Vencidas las ventanas, los slots se reutilizan
+    assert limiter.hit("other@a.com", now + 121) == 0
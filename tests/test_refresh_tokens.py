@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.security import hash_refresh_token
+from app.models.token import RefreshToken
+from app.repositories.user_repository import UserRepository
+from app.services.auth_services import AuthService
+
+
+async def _user(db_session, email: str):
+    return await UserRepository(db_session).create({
+        "email": email, "hashed_password": "x", "full_name": "Refresh",
+    })
+
+
+async def _stored(db_session, token: str) -> RefreshToken:
+    result = await db_session.execute(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+        .execution_options(populate_existing=True))
+    return result.scalar_one()
+
+
+@pytest.mark.anyio
+async def test_rotation_issues_a_new_token_in_the_same_family(db_session):
+    """Rotar marca el token como usado y emite otro de la misma familia"""
+    service = AuthService(db_session)
+    user = await _user(db_session, "rotate@test.com")
+    token = await service.issue_refresh_token(user)
+
+    rotated_user, new_token = await service.rotate_refresh_token(token)
+
+    old, new = await _stored(db_session, token), await _stored(db_session, new_token)
+    assert rotated_user.id == user.id and new_token != token
+    assert old.used_at is not None and new.used_at is None
+    assert new.family_id == old.family_id and new.is_active
+
+
+@pytest.mark.anyio
+async def test_reusing_a_rotated_token_revokes_the_family_for_good(db_session):
+    """Reusar un token rotado revoca toda la familia, aunque la peticion falle"""
+    service = AuthService(db_session)
+    user = await _user(db_session, "reuse@test.com")
+    token = await service.issue_refresh_token(user)
+    _, new_token = await service.rotate_refresh_token(token)
+
+    assert await service.rotate_refresh_token(token) is None
+    # get_db revierte la transaccion de la peticion que responde con error
+    await db_session.rollback()
+
+    assert not (await _stored(db_session, token)).is_active
+    assert not (await _stored(db_session, new_token)).is_active
+    assert await service.rotate_refresh_token(new_token) is None
+
+
+@pytest.mark.anyio
+async def test_expired_refresh_token_is_rejected(db_session):
+    """Un token vencido no se puede rotar"""
+    service = AuthService(db_session)
+    user = await _user(db_session, "expired@test.com")
+    token = await service.issue_refresh_token(user)
+    stored = await _stored(db_session, token)
+    stored.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await db_session.flush()
+
+    assert await service.rotate_refresh_token(token) is None
+    assert (await _stored(db_session, token)).used_at is None
+
+
+@pytest.mark.anyio
+async def test_logout_revokes_only_the_callers_family(db_session):
+    """El logout revoca la familia del usuario e ignora tokens ajenos"""
+    service = AuthService(db_session)
+    user = await _user(db_session, "logout@test.com")
+    other = await _user(db_session, "other@test.com")
+    token = await service.issue_refresh_token(user)
+    _, token = await service.rotate_refresh_token(token)
+    other_token = await service.issue_refresh_token(other)
+
+    await service.revoke_refresh_token(other_token, user.id)
+    await service.revoke_refresh_token(token, user.id)
+
+    assert (await _stored(db_session, other_token)).is_active
+    assert not (await _stored(db_session, token)).is_active
+    assert await service.rotate_refresh_token(token) is None
+
+
+@pytest.mark.anyio
+async def test_purge_keeps_tokens_of_live_families(db_session):
+    """Se borran los tokens vencidos cuya familia ya vencio entera"""
+    service = AuthService(db_session)
+    user = await _user(db_session, "purge@test.com")
+    dead = await service.issue_refresh_token(user)
+    used = await service.issue_refresh_token(user)
+    _, live = await service.rotate_refresh_token(used)
+    past = datetime.now(timezone.utc) - timedelta(days=1)
+    (await _stored(db_session, dead)).expires_at = past
+    (await _stored(db_session, used)).expires_at = past
+    await db_session.flush()
+
+    assert await service.refresh_token_repository.purge_expired(limit=100) >= 1
+
+    remaining = set((await db_session.execute(
+        select(RefreshToken.token_hash).where(RefreshToken.user_id == user.id))).scalars())
+    assert remaining == {hash_refresh_token(used), hash_refresh_token(live)}
+
+
+@pytest.mark.anyio
+async def test_purge_deletes_expired_revocations(db_session):
+    """Las revocaciones vencidas ya no hacen falta"""
+    repository = AuthService(db_session).revoked_token_repository
+    now = datetime.now(timezone.utc)
+    await repository.revoke("purge-expired", now - timedelta(minutes=1))
+    await repository.revoke("purge-live", now + timedelta(minutes=30))
+
+    await repository.purge_expired(limit=100)
+
+    assert not await repository.is_revoked("purge-expired")
+    assert await repository.is_revoked("purge-live")
@@ -0,0 +1,325 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import InvalidRequestError
+
+from app.core.batch import BatchValidationError
+from app.core.pagination import encode_cursor
+from app.models.persona import Persona, TipoContacto, TipoIdentificacion, TipoPersona
+from app.repositories.archive_repository import ArchiveRepository
+from app.repositories.loading import LoadProfile
+from app.repositories.user_repository import UserRepository
+from app.repositories.persona_repository import PersonaRepository, SearchUnavailableError
+from app.schemas.persona import (ContactoCreate, IdentificacionCreate, PersonaBatchUpdateItem,
+                                 PersonaCreate, PersonaResponse, PersonaUpdate)
+from app.services.persona_service import PersonaService
+
+
+@pytest.mark.anyio
+async def test_create_returns_server_columns_in_one_statement(db_session, sql_statements):
+    """create emite un solo INSERT ... RETURNING, sin SELECT posterior"""
+    user = await UserRepository(db_session).create({
+        "email": "returning@test.com", "hashed_password": "x", "full_name": "Returning",
+    })
+
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith("INSERT INTO users")
+    assert "RETURNING" in sql_statements[0]
+    assert user.id is not None and user.created_at is not None
+
+
+@pytest.mark.anyio
+async def test_update_returns_updated_at_in_one_statement(db_session, sql_statements):
+    """update emite un solo UPDATE ... RETURNING"""
+    repository = UserRepository(db_session)
+    user = await repository.create({
+        "email": "update@test.com", "hashed_password": "x", "full_name": "Before",
+    })
+    sql_statements.clear()
+
+    user = await repository.update(user, {"full_name": "After"})
+
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith("UPDATE users")
+    assert "RETURNING" in sql_statements[0]
+    assert user.full_name == "After" and user.updated_at is not None
+
+
+@pytest.mark.anyio
+async def test_update_by_id_does_not_load_first(db_session, sql_statements):
+    """update_by_id: un UPDATE ... WHERE id AND is_active RETURNING, sin SELECT previo"""
+    repository = UserRepository(db_session)
+    user = await repository.create({
+        "email": "by-id@test.com", "hashed_password": "x", "full_name": "Before",
+    })
+    sql_statements.clear()
+
+    updated = await repository.update_by_id(user.id, {"full_name": "After", "role": None})
+
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith("UPDATE users")
+    assert "RETURNING" in sql_statements[0]
+    assert updated.full_name == "After" and updated.role == user.role
+
+    await repository.delete(updated)
+    assert await repository.update_by_id(user.id, {"full_name": "Again"}) is None
+
+
+@pytest.mark.anyio
+async def test_update_persona_loads_relations_with_the_update(db_session, sql_statements):
+    """update_persona: UPDATE ... RETURNING mas la carga de identificacion y contactos"""
+    service = PersonaService(db_session)
+    persona = await service.create_persona(_persona("0940000001"))
+    sql_statements.clear()
+
+    updated = await service.update_persona(persona.id, PersonaUpdate(nombre="Nuevo"))
+
+    assert sql_statements[0].startswith("UPDATE persona")
+    assert len(sql_statements) == 3
+    response = PersonaResponse.model_validate(updated)
+    assert response.nombre == "Nuevo"
+    assert [i.numero for i in response.identificacion] == ["0940000001"]
+    assert await service.update_persona(0, PersonaUpdate(nombre="Nadie")) is None
+
+
+@pytest.mark.anyio
+async def test_create_persona_does_not_read_back(db_session, sql_statements):
+    """create_persona: una verificacion de duplicados + un INSERT por tabla"""
+    persona = await PersonaService(db_session).create_persona(PersonaCreate(
+        tipo_persona=TipoPersona.NATURAL, nombre="Ana", apellido="Lopez",
+        identificacion=[
+            IdentificacionCreate(tipo=TipoIdentificacion.CEDULA, numero="0911111111"),
+            IdentificacionCreate(tipo=TipoIdentificacion.PASAPORTE, numero="PA123456"),
+        ],
+    ))
+
+    inserts = [s for s in sql_statements if s.startswith("INSERT")]
+    assert len(inserts) == 2
+    assert not any(s.startswith("SELECT") for s in sql_statements[sql_statements.index(inserts[0]):])
+    assert len(sql_statements) == 3
+    assert [i.numero for i in persona.identificacion] == ["0911111111", "PA123456"]
+
+
+@pytest.mark.anyio
+async def test_create_persona_keeps_contacts(db_session, sql_statements):
+    """Los contactos se insertan en un INSERT multi-fila y salen en la respuesta"""
+    persona = await PersonaService(db_session).create_persona(PersonaCreate(
+        tipo_persona=TipoPersona.NATURAL, nombre="Ana",
+        identificacion=[IdentificacionCreate(tipo=TipoIdentificacion.CEDULA, numero="0933333333")],
+        contacto=[
+            ContactoCreate(tipo=TipoContacto.EMAIL, valor="ana@test.com", es_principal=True),
+            ContactoCreate(tipo=TipoContacto.CELULAR, valor="0999999999"),
+        ],
+    ))
+
+    assert len(sql_statements) == 4  # verificacion + persona, identificacion, contacto
+    response = PersonaResponse.model_validate(persona)
+    assert [(c.valor, c.es_principal) for c in response.contactos] == [
+        ("ana@test.com", True), ("0999999999", False)]
+
+    with pytest.raises(ValueError, match="Contact ana@test.com already exists"):
+        await PersonaService(db_session).create_persona(PersonaCreate(
+            tipo_persona=TipoPersona.NATURAL, nombre="Otra",
+            identificacion=[IdentificacionCreate(tipo=TipoIdentificacion.CEDULA,
+                                                 numero="0944444444")],
+            contacto=[ContactoCreate(tipo=TipoContacto.EMAIL, valor="ana@test.com")],
+        ))
+
+
+def _persona(numero: str) -> PersonaCreate:
+    return PersonaCreate(tipo_persona=TipoPersona.NATURAL, nombre=f"P{numero}",
+                         identificacion=[IdentificacionCreate(tipo=TipoIdentificacion.CEDULA,
+                                                              numero=numero)])
+
+
+@pytest.mark.anyio
+async def test_create_personas_batch_uses_one_statement_per_table(db_session, sql_statements):
+    """create_personas: una verificacion para todo el lote + un INSERT por tabla"""
+    personas = await PersonaService(db_session).create_personas(
+        [_persona(f"09000000{i:02d}") for i in range(25)])
+
+    assert len(sql_statements) == 3
+    assert [p.nombre for p in personas] == [f"P09000000{i:02d}" for i in range(25)]
+    assert all(p.identificacion[0].persona_id == p.id for p in personas)
+
+
+@pytest.mark.anyio
+async def test_create_personas_batch_reports_every_error(db_session, sql_statements):
+    """Un lote invalido no escribe nada y reporta cada item con error"""
+    service = PersonaService(db_session)
+    await service.create_persona(_persona("0911111111"))
+    sql_statements.clear()
+
+    with pytest.raises(BatchValidationError) as error:
+        await service.create_personas([
+            _persona("0922222222"),
+            _persona("0911111111"),
+            _persona("0922222222"),
+            PersonaCreate(tipo_persona=TipoPersona.NATURAL, nombre="Sin id"),
+        ])
+
+    assert [e["index"] for e in error.value.errors] == [1, 2, 3]
+    assert not any(s.startswith("INSERT") for s in sql_statements)
+
+
+@pytest.mark.anyio
+async def test_update_and_soft_delete_many(db_session, sql_statements):
+    """update_many agrupa por columnas y soft_delete_many usa un solo UPDATE"""
+    service = PersonaService(db_session)
+    personas = await service.create_personas([_persona(f"09300000{i:02d}") for i in range(3)])
+    ids = [p.id for p in personas]
+    sql_statements.clear()
+
+    updated = await service.update_personas([
+        PersonaBatchUpdateItem(id=ids[0], nombre="Uno"),
+        PersonaBatchUpdateItem(id=ids[1], nombre="Dos"),
+        PersonaBatchUpdateItem(id=ids[2], apellido="Tres"),
+    ])
+
+    assert sorted(updated) == sorted(ids)
+    assert len(sql_statements) == 3  # ids activos + un UPDATE por grupo de columnas
+    assert [p.nombre for p in personas] == ["Uno", "Dos", "P0930000002"]
+    assert personas[2].apellido == "Tres"
+
+    sql_statements.clear()
+    deleted = await PersonaRepository(db_session).soft_delete_many(ids[:2] + [0])
+
+    assert sorted(deleted) == sorted(ids[:2])
+    assert len(sql_statements) == 1
+    assert not personas[0].is_active and personas[2].is_active
+
+
+@pytest.mark.anyio
+async def test_list_returns_each_persona_once(db_session):
+    """Una persona con varias identificaciones ocupa una sola fila de la pagina"""
+    personas = await PersonaService(db_session).create_personas([
+        PersonaCreate(tipo_persona=TipoPersona.JURIDICA, razon_social=f"Empresa {i}",
+                      identificacion=[
+                          IdentificacionCreate(tipo=TipoIdentificacion.RUC, numero=f"179100000{i}001"),
+                          IdentificacionCreate(tipo=TipoIdentificacion.CEDULA, numero=f"179100000{i}"),
+                      ])
+        for i in range(3)
+    ])
+
+    page = await PersonaRepository(db_session).get_page(
+        limit=2, after=encode_cursor(personas[0].id - 1), tipo=TipoPersona.JURIDICA)
+
+    assert [p.id for p in page.items] == [personas[0].id, personas[1].id]
+
+
+@pytest.mark.anyio
+async def test_search_name_follows_every_write(db_session):
+    """search_name se recalcula en la BD: minusculas, sin tildes, tambien en lote"""
+    repository = PersonaRepository(db_session)
+    persona = await PersonaService(db_session).create_persona(PersonaCreate(
+        tipo_persona=TipoPersona.NATURAL, nombre="José", apellido="NÚÑEZ",
+        identificacion=[IdentificacionCreate(tipo=TipoIdentificacion.CEDULA, numero="0955555555")],
+    ))
+    search_name = select(Persona.search_name).where(Persona.id == persona.id)
+    assert (await db_session.scalar(search_name)).split() == ["jose", "nunez"]
+
+    await repository.update_many([{"id": persona.id, "apellido": "Peña"}])
+    assert (await db_session.scalar(search_name)).split() == ["jose", "pena"]
+
+
+@pytest.mark.anyio
+async def test_search_ranks_matches_with_keyset_pages(db_session):
+    """search: mejor coincidencia primero, sin tildes, paginado por (distancia, id)"""
+    if not await db_session.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")):
+        pytest.skip("pg_trgm is not installed")
+
+    await PersonaService(db_session).create_personas([
+        PersonaCreate(tipo_persona=TipoPersona.JURIDICA, razon_social=razon_social,
+                      identificacion=[IdentificacionCreate(tipo=TipoIdentificacion.RUC,
+                                                           numero=f"17920000{i}0001")])
+        for i, razon_social in enumerate(["Ferretería Andina", "Ferreteria Andina Norte",
+                                          "Panadería Quito"])
+    ])
+    repository = PersonaRepository(db_session)
+
+    first = await repository.search("ferreteria andina", limit=1)
+    second = await repository.search("ferreteria andina", limit=1, after=first.next_cursor)
+
+    assert [p.razon_social for p in first.items + second.items] == [
+        "Ferretería Andina", "Ferreteria Andina Norte"]
+    assert not (await repository.search("panaderia", after=None)).next_cursor
+
+
+@pytest.mark.anyio
+async def test_search_without_pg_trgm_is_reported_as_unavailable(db_session):
+    """Sin pg_trgm la busqueda falla con un error propio (503), no con un 500"""
+    if await db_session.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")):
+        pytest.skip("pg_trgm is installed")
+
+    with pytest.raises(SearchUnavailableError):
+        await PersonaRepository(db_session).search("ferreteria")
+
+
+@pytest.mark.anyio
+async def test_archive_moves_old_inactive_personas_with_their_rows(db_session):
+    """Solo las personas inactivas hace mas que la retencion pasan al archivo, con sus filas"""
+    service = PersonaService(db_session)
+    data = _persona("0950000001")
+    data.contacto = [ContactoCreate(tipo=TipoContacto.EMAIL, valor="archivo@test.com")]
+    old, recent, active = await service.create_personas(
+        [data, _persona("0950000002"), _persona("0950000003")])
+    await PersonaRepository(db_session).soft_delete_many([old.id, recent.id])
+    await db_session.execute(text("UPDATE persona SET updated_at = now() - interval '100 days' "
+                                  "WHERE id = ANY(:ids)"), {"ids": [old.id, active.id]})
+
+    moved = await ArchiveRepository(db_session).archive_batch("persona", timedelta(days=90), 100)
+
+    assert moved == {"identificacion": 1, "contacto": 1, "cliente": 0, "proveedor": 0,
+                     "empleado": 0, "persona": 1}
+    live = (await db_session.execute(text("SELECT id FROM persona WHERE id = ANY(:ids)"),
+                                     {"ids": [old.id, recent.id, active.id]})).scalars().all()
+    assert sorted(live) == sorted([recent.id, active.id])
+    archived = (await db_session.execute(
+        text("SELECT numero FROM identificacion_archive WHERE persona_id = :id"),
+        {"id": old.id})).scalars().all()
+    assert archived == ["0950000001"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [2, 20])
+async def test_list_profile_statement_count_does_not_depend_on_page_size(db_session,
+                                                                         sql_statements, limit):
+    """Perfil list: pagina + una consulta por coleccion, sin importar cuantas filas trae"""
+    items = []
+    for i in range(20):
+        data = _persona(f"09600000{i:02d}")
+        data.contacto = [ContactoCreate(tipo=TipoContacto.EMAIL, valor=f"perfil{i}@test.com")]
+        items.append(data)
+    personas = await PersonaService(db_session).create_personas(items)
+    after = encode_cursor(personas[0].id - 1)
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    page = await PersonaRepository(db_session).get_page(limit=limit, after=after)
+
+    assert len(page.items) == limit
+    assert len(sql_statements) == 3  # pagina con total, identificacion, contacto
+    responses = [PersonaResponse.model_validate(p) for p in page.items]
+    assert all(len(r.identificacion) == 1 and len(r.contactos) == 1 for r in responses)
+    assert len(sql_statements) == 3
+
+
+@pytest.mark.anyio
+async def test_profiles_raise_instead_of_lazy_loading(db_session, sql_statements):
+    """Una relacion fuera del perfil falla en vez de cargarse fila por fila; export la incluye"""
+    persona = await PersonaService(db_session).create_persona(_persona("0970000001"))
+    db_session.expunge_all()
+    repository = PersonaRepository(db_session)
+
+    detail = await repository.get_by_id(persona.id)
+    with pytest.raises(InvalidRequestError):
+        detail.cliente
+    db_session.expunge_all()
+    sql_statements.clear()
+
+    exported = await repository.get_by_id(persona.id, profile=LoadProfile.EXPORT)
+
+    assert len(sql_statements) == 3  # persona con cliente/proveedor/empleado, identificacion, contacto
+    assert exported.cliente is None and exported.empleado is None
+    assert len(sql_statements) == 3
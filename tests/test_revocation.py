@@ -0,0 +1,84 @@
+import pytest
+
+from app.core.revocation import BloomFilter, RevocationList
+from app.core.security import decode_token, hash_password
+from app.database import get_db, get_read_db
+from app.main import app
+from app.repositories.user_repository import UserRepository
+
+
+@pytest.fixture
+async def api_client(client, db_session):
+    """Cliente HTTP cuyas peticiones usan db_session"""
+    async def override():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override
+    app.dependency_overrides[get_read_db] = override
+    try:
+        yield client
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+
+
+async def _login(api_client, db_session, email: str) -> str:
+    await UserRepository(db_session).create({
+        "email": email, "hashed_password": hash_password("secret1"), "full_name": "Logout",
+    })
+    response = await api_client.post("/api/v1/auth/login",
+                                      json={"email": email, "password": "secret1"})
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Todo elemento agregado debe encontrarse"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate():
+    """La tasa de falsos positivos se mantiene cerca de la configurada"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.anyio
+async def test_logged_out_access_token_is_rejected(api_client, db_session):
+    """Tras el logout el mismo access token responde 401"""
+    token = await _login(api_client, db_session, "logout@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await api_client.get("/api/v1/auth/me", headers=headers)).status_code == 200
+
+    response = await api_client.post("/api/v1/auth/logout", headers=headers)
+    assert response.status_code == 204
+
+    response = await api_client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+
+@pytest.mark.anyio
+async def test_revoked_jti_is_rejected_after_refresh(api_client, db_session):
+    """Otro worker ve la revocacion al refrescar su lista desde la BD"""
+    token = await _login(api_client, db_session, "worker@test.com")
+    other_worker = RevocationList(capacity=1000, error_rate=0.01, refresh_seconds=60)
+    await other_worker.refresh(db_session)
+    jti = decode_token(token)["jti"]
+    assert not await other_worker.is_revoked(db_session, jti)
+
+    response = await api_client.post("/api/v1/auth/logout",
+                                     headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 204
+
+    await other_worker.refresh(db_session)
+    assert await other_worker.is_revoked(db_session, jti)
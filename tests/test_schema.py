@@ -0,0 +1,12 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from app.core.schema import SCHEMA_REVISION
+
+
+def test_schema_revision_is_migration_head():
+    """SCHEMA_REVISION debe ser el unico head de las migraciones"""
+    script = ScriptDirectory.from_config(Config(str(Path(__file__).resolve().parents[1] / "alembic.ini")))
+    assert script.get_heads() == [SCHEMA_REVISION]
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from app.core import cache as cache_module
+from app.core.security import (configure_password_hashing, create_access_token, decode_token,
+                               hash_password, invalid_token_cache, token_cache,
+                               verify_and_update_password)
+
+
+def test_decode_token_is_memoized():
+    """Un token valido se verifica una sola vez"""
+    token_cache.clear()
+    token = create_access_token({"sub": "1"})
+
+    first = decode_token(token)
+    second = decode_token(token)
+
+    assert first == second
+    assert first["sub"] == "1"
+    assert token_cache.hits >= 1
+    assert len(token_cache) == 1
+
+
+def test_cached_payload_is_not_shared():
+    """Modificar el payload devuelto no altera la cache"""
+    token = create_access_token({"sub": "2"})
+    decode_token(token)["sub"] = "tampered"
+
+    assert decode_token(token)["sub"] == "2"
+
+
+def test_invalid_token_is_cached_negatively():
+    """Un token invalido se rechaza y se recuerda"""
+    invalid_token_cache.clear()
+
+    assert decode_token("not-a-jwt") is None
+    assert decode_token("not-a-jwt") is None
+    assert invalid_token_cache.hits == 1
+
+
+def test_cached_token_expires_with_exp(monkeypatch):
+    """La entrada de cache expira junto con el token"""
+    token_cache.clear()
+    token = create_access_token({"sub": "3"}, expires_delta=timedelta(seconds=30))
+    assert decode_token(token) is not None
+
+    real_monotonic = cache_module.time.monotonic
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: real_monotonic() + 31)
+
+    misses = token_cache.misses
+    assert decode_token(token) is not None
+    assert token_cache.misses == misses + 1
+
+
+def test_outdated_hash_is_upgraded_on_verify():
+    """Un hash con otro costo se regenera al verificarlo"""
+    try:
+        configure_password_hashing(4)
+        old_hash = hash_password("secret1")
+        configure_password_hashing(5)
+
+        valid, new_hash = verify_and_update_password("secret1", old_hash)
+        assert valid
+        assert new_hash.startswith("$2b$05$")
+
+        valid, new_hash = verify_and_update_password("secret1", hash_password("secret1"))
+        assert valid
+        assert new_hash is None
+    finally:
+        configure_password_hashing(12)
@@ -0,0 +1,38 @@
+import logging
+
+from app.core.sql_metrics import SQLStats, normalize_statement
+
+
+def test_normalize_statement_groups_by_shape():
+    """Parametros, literales y listas de valores no separan sentencias"""
+    first = normalize_statement("SELECT * FROM users WHERE id IN ($1, $2, $3) AND email = 'a@a.com'")
+    second = normalize_statement("SELECT *\n  FROM users WHERE id IN ($1) AND email = 'b@b.com'")
+
+    assert first == second == "SELECT * FROM users WHERE id IN (...) AND email = ?"
+
+
+def test_sql_stats_top_and_slow_log(caplog):
+    """Agrega por sentencia y registra solo las lentas con su ruta"""
+    stats = SQLStats(slow_threshold_ms=100, max_statements=10)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.sql_metrics"):
+        stats.record("SELECT 1", 5, "GET /fast")
+        stats.record("SELECT 2", 7, "GET /fast")
+        stats.record("SELECT * FROM persona", 150, "GET /api/v1/persona/")
+
+    top = stats.top(limit=2)
+    assert [item["statement"] for item in top] == ["SELECT * FROM persona", "SELECT ?"]
+    assert top[1]["count"] == 2
+    assert top[0]["slow"] == 1
+    assert len(caplog.records) == 1
+    assert "GET /api/v1/persona/" in caplog.text
+
+
+def test_sql_stats_is_bounded():
+    """Las formas nuevas se agrupan cuando se alcanza el limite"""
+    stats = SQLStats(slow_threshold_ms=100, max_statements=2)
+    for table in ("a", "b", "c", "d"):
+        stats.record(f"SELECT * FROM {table}", 1, None)
+
+    assert len(stats.statements) == 3
+    assert stats.statements[SQLStats.OTHER].count == 2